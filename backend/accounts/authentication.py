@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def token_cache():
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    return f'auth-token:{key}'
+
+
+def token_expired(token):
+    expiry = settings.TOKEN_EXPIRY
+    return expiry is not None and token.created + expiry <= timezone.now()
+
+
+def invalidate_token(key):
+    token_cache().delete(token_cache_key(key))
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that keeps the token and its user in the
+    ``TOKEN_CACHE_ALIAS`` cache, so a warm request authenticates without
+    touching the database.
+
+    Entries are dropped when the token is deleted or the user is saved (see
+    accounts/signals.py). Every worker reads the same cache, so with a shared
+    backend (CACHE_BACKEND) a logout or a deactivation applies to all of them
+    at once; entries also expire after ``TOKEN_CACHE_TIMEOUT`` seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        # Cache reads unpickle, so every request gets its own instances with
+        # empty relation caches for the views to prefetch onto.
+        token = token_cache().get(token_cache_key(key))
+        if token is None:
+            token = self.get_token(key)
+            token_cache().set(token_cache_key(key), token, settings.TOKEN_CACHE_TIMEOUT)
+
+        if token_expired(token):
+            self.get_model().objects.filter(key=key).delete()
+            invalidate_token(key)
+            raise AuthenticationFailed('Token has expired.')
+        return token.user, token
+
+    def get_token(self, key):
+        try:
+            token = self.get_model().objects.select_related('user').get(key=key)
+        except self.get_model().DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return token
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:30
+
+import itertools
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from accounts import rollups
+
+
+def backfill_rollups(apps, schema_editor):
+    DailyUserProgress = apps.get_model('accounts', 'DailyUserProgress')
+    ProgressRollup = apps.get_model('accounts', 'ProgressRollup')
+    days = DailyUserProgress.objects.order_by('user_id', 'date').values('user_id', *rollups.DAY_FIELDS)
+
+    batch = []
+    for period in rollups.PERIODS:
+        def bucket(day):
+            return day['user_id'], rollups.period_start(period, day['date'])
+
+        for (user_id, start), bucket_days in itertools.groupby(days.iterator(), key=bucket):
+            summary = rollups.summarise_days(list(bucket_days))
+            batch.append(ProgressRollup(user_id=user_id, period=period, period_start=start, **summary))
+            if len(batch) >= 1000:
+                ProgressRollup.objects.bulk_create(batch)
+                batch = []
+    ProgressRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_alter_dailyuserprogress_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('days_logged', models.PositiveIntegerField(default=0)),
+                ('workouts_completed', models.PositiveIntegerField(default=0)),
+                ('longest_workout_streak', models.PositiveIntegerField(default=0)),
+                ('kcal_consumed', models.FloatField(default=0.0)),
+                ('protein_consumed', models.FloatField(default=0.0)),
+                ('carbs_consumed', models.FloatField(default=0.0)),
+                ('fat_consumed', models.FloatField(default=0.0)),
+                ('water_consumed', models.FloatField(default=0.0)),
+                ('kcal_burned', models.FloatField(default=0.0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'period_start'), name='unique_progress_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
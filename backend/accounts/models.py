@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Round
+import itertools
 import uuid
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
@@ -6,6 +9,7 @@ from fitcom_app.models import WorkoutProgram, UserCustomWorkoutProgram
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
+from . import rollups
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password, **extra_fields):
@@ -32,6 +36,10 @@ class CustomUserManager(BaseUserManager):
 
 
 
+NEEDS_INPUT_FIELDS = ('weight', 'height', 'age', 'gender', 'userLevel')
+NEEDS_FIELDS = ('water_needs', 'kcal_needs', 'carbs_needs', 'protein_needs', 'fat_needs')
+
+
 class User(AbstractUser):
     ACTIVITY_LEVEL_CHOICES = [
         ('Sedentary', 'Sedentary: little or no exercise'),
@@ -80,7 +88,32 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
-    def calculate_needs(self):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(NEEDS_INPUT_FIELDS).issubset(field_names):
+            instance._needs_inputs = instance.get_needs_inputs()
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The needs only depend on NEEDS_INPUT_FIELDS, so they are recomputed
+        # when one of those changed since they were last calculated.
+        if self.has_needs_inputs() and self.get_needs_inputs() != getattr(self, '_needs_inputs', None):
+            self.calculate_needs(commit=False)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *NEEDS_FIELDS}
+        super().save(*args, **kwargs)
+
+    def get_needs_inputs(self):
+        return tuple(getattr(self, field) for field in NEEDS_INPUT_FIELDS)
+
+    def has_needs_inputs(self):
+        return (
+            self.weight is not None and self.height is not None and self.age is not None
+            and self.gender in ('male', 'female')
+        )
+
+    def calculate_needs(self, commit=True):
         if self.gender == 'male':
             bmr = 10 * self.weight + 6.25 * self.height - 5 * self.age + 5
         elif self.gender == 'female':
@@ -101,8 +134,22 @@ class User(AbstractUser):
         self.fat_needs = round(self.kcal_needs * 0.25 / 9, 1)
         self.carbs_needs = round((self.kcal_needs - (self.protein_needs * 4 + self.fat_needs * 9)) / 4, 1)
         self.water_needs = round(self.weight * 0.033, 1)
+        self._needs_inputs = self.get_needs_inputs()
+
+        if commit:
+            self.save()
+
 
-        self.save()
+class DailyUserProgressQuerySet(models.QuerySet):
+    def with_needs_diffs(self):
+        """Annotates the consumed-minus-needed differences, computed in SQL."""
+        return self.annotate(
+            kcal_diff=Round(F('kcal_consumed') - F('user__kcal_needs'), 1),
+            protein_diff=Round(F('protein_consumed') - F('user__protein_needs'), 1),
+            carbs_diff=Round(F('carbs_consumed') - F('user__carbs_needs'), 1),
+            fat_diff=Round(F('fat_consumed') - F('user__fat_needs'), 1),
+            water_diff=Round(F('water_consumed') - F('user__water_needs'), 1),
+        )
 
 
 class DailyUserProgress(models.Model):
@@ -117,6 +164,8 @@ class DailyUserProgress(models.Model):
     fat_consumed = models.FloatField(default=0.0)
     water_consumed = models.FloatField(default=0.0)
 
+    objects = DailyUserProgressQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'date')
         ordering = ['-date']
@@ -124,10 +173,17 @@ class DailyUserProgress(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.date}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_date = instance.__dict__.get('date')
+        return instance
+
     def get_progress_vs_needs(self):
 
         user = self.user
-        user.calculate_needs()
+        if user.kcal_needs is None:
+            user.calculate_needs()
         return {
             'kcal_diff': round(self.kcal_consumed - user.kcal_needs, 1),
             'protein_diff': round(self.protein_consumed - user.protein_needs, 1),
@@ -135,3 +191,101 @@ class DailyUserProgress(models.Model):
             'fat_diff': round(self.fat_consumed - user.fat_needs, 1),
             'water_diff': round(self.water_consumed - user.water_needs, 1)
         }
+
+
+class ProgressRollup(models.Model):
+    """
+    Weekly and monthly totals of a user's DailyUserProgress, kept up to date
+    whenever a day is written so charts read a few rows instead of every day.
+    """
+    class Period(models.TextChoices):
+        WEEK = rollups.WEEK, 'Week'
+        MONTH = rollups.MONTH, 'Month'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='progress_rollups')
+    period = models.CharField(max_length=5, choices=Period.choices)
+    period_start = models.DateField()
+    days_logged = models.PositiveIntegerField(default=0)
+    workouts_completed = models.PositiveIntegerField(default=0)
+    longest_workout_streak = models.PositiveIntegerField(default=0)
+
+    kcal_consumed = models.FloatField(default=0.0)
+    protein_consumed = models.FloatField(default=0.0)
+    carbs_consumed = models.FloatField(default=0.0)
+    fat_consumed = models.FloatField(default=0.0)
+    water_consumed = models.FloatField(default=0.0)
+    kcal_burned = models.FloatField(default=0.0)
+
+    class Meta:
+        ordering = ['period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'period_start'], name='unique_progress_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.period} of {self.period_start}"
+
+    def get_averages(self):
+        return {field: round(getattr(self, field) / self.days_logged, 1) for field in rollups.SUM_FIELDS}
+
+    @classmethod
+    def rebuild(cls, user_ids, batch_size=1000):
+        """Recomputes every bucket of `user_ids` from scratch, e.g. after bulk-loading days."""
+        cls.objects.filter(user_id__in=user_ids).delete()
+        days = (
+            DailyUserProgress.objects
+            .filter(user_id__in=user_ids)
+            .order_by('user_id', 'date')
+            .values('user_id', *rollups.DAY_FIELDS)
+        )
+        for period in rollups.PERIODS:
+            batch = []
+            for (user_id, start), bucket_days in itertools.groupby(
+                days.iterator(), key=lambda day: (day['user_id'], rollups.period_start(period, day['date']))
+            ):
+                batch.append(cls(user_id=user_id, period=period, period_start=start, **rollups.summarise_days(list(bucket_days))))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    batch = []
+            cls.objects.bulk_create(batch)
+
+    @classmethod
+    def refresh(cls, user_id, dates):
+        """Recomputes the week and month buckets containing `dates` from the raw days."""
+        buckets = {(period, rollups.period_start(period, day)) for day in dates for period in rollups.PERIODS}
+        if not buckets:
+            return
+        bounds = [(period, start, rollups.period_end(period, start)) for period, start in buckets]
+        with transaction.atomic():
+            # Concurrent writes for one user would otherwise each summarise the
+            # days they saw and the last upsert would drop the other's day, so
+            # refreshes of a user's buckets take turns on the user row.
+            list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+            cls._refresh_buckets(user_id, bounds)
+
+    @classmethod
+    def _refresh_buckets(cls, user_id, bounds):
+        days = list(
+            DailyUserProgress.objects
+            .filter(user_id=user_id, date__range=(min(b[1] for b in bounds), max(b[2] for b in bounds)))
+            .order_by('date')
+            .values(*rollups.DAY_FIELDS)
+        )
+
+        filled, empty = [], Q()
+        for period, start, end in bounds:
+            bucket_days = [day for day in days if start <= day['date'] <= end]
+            if bucket_days:
+                filled.append(cls(user_id=user_id, period=period, period_start=start, **rollups.summarise_days(bucket_days)))
+            else:
+                empty |= Q(period=period, period_start=start)
+
+        if filled:
+            cls.objects.bulk_create(
+                filled,
+                update_conflicts=True,
+                unique_fields=['user', 'period', 'period_start'],
+                update_fields=['days_logged', 'workouts_completed', 'longest_workout_streak', *rollups.SUM_FIELDS],
+            )
+        if empty:
+            cls.objects.filter(empty, user_id=user_id).delete()
@@ -0,0 +1,51 @@
+"""
+Helpers shared by `ProgressRollup` and its backfill migration, so they only
+deal with plain dates and dicts and never import models.
+"""
+from datetime import timedelta
+
+WEEK = 'week'
+MONTH = 'month'
+PERIODS = (WEEK, MONTH)
+
+SUM_FIELDS = ('kcal_consumed', 'protein_consumed', 'carbs_consumed', 'fat_consumed', 'water_consumed', 'kcal_burned')
+DAY_FIELDS = ('date', 'workout_completed') + SUM_FIELDS
+
+
+def period_start(period, day):
+    if period == WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(period, start):
+    if period == WEEK:
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def summarise_days(days):
+    """
+    Totals for one bucket. `days` are dicts with DAY_FIELDS, sorted by date;
+    a workout streak is broken by a day without a workout or without an entry.
+    """
+    summary = {field: 0.0 for field in SUM_FIELDS}
+    summary.update(days_logged=0, workouts_completed=0, longest_workout_streak=0)
+    streak = 0
+    previous_date = None
+    for day in days:
+        for field in SUM_FIELDS:
+            summary[field] += day[field]
+        summary['days_logged'] += 1
+        if day['workout_completed']:
+            summary['workouts_completed'] += 1
+            consecutive = previous_date is not None and day['date'] - previous_date == timedelta(days=1)
+            streak = streak + 1 if consecutive else 1
+            summary['longest_workout_streak'] = max(summary['longest_workout_streak'], streak)
+        else:
+            streak = 0
+        previous_date = day['date']
+    for field in SUM_FIELDS:
+        summary[field] = round(summary[field], 1)
+    return summary
@@ -1,11 +1,11 @@
 # serializers.py
 from rest_framework import serializers
 from rest_framework.validators import ValidationError
-from .models import User, DailyUserProgress
+from .models import User, DailyUserProgress, ProgressRollup
 from rest_framework.authtoken.models import Token
 from fitcom_app.models import WorkoutProgram, UserCustomWorkoutProgram
-from fitcom_app.serializers import WorkoutProgramSerializer, UserCustomWorkoutProgramSerializer
-from django.contrib.contenttypes.models import ContentType
+from fitcom_app.serializers import FlexFieldsMixin, WorkoutProgramSerializer, UserCustomWorkoutProgramSerializer
+from django.utils import timezone
 
 class RegisterSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(max_length=80)
@@ -38,8 +38,6 @@ class RegisterSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
         user = super().create(validated_data)
         user.set_password(password)
-        if not user.is_staff:
-            user.calculate_needs()
         user.save()
         Token.objects.create(user=user)
         return user
@@ -48,7 +46,6 @@ class RegisterSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
         user = super().create(validated_data)
         user.set_password(password)
-        user.calculate_needs()
         user.save()
         Token.objects.create(user=user)
 
@@ -58,7 +55,7 @@ class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     selected_workout_program = serializers.SerializerMethodField()
     saved_workout_programs = UserCustomWorkoutProgramSerializer(many=True, read_only=True)
 
@@ -68,28 +65,59 @@ class UserSerializer(serializers.ModelSerializer):
                   'profilePicture', 'age', 'selected_workout_program',
                   'saved_workout_programs',
                   'water_needs', 'kcal_needs', 'carbs_needs', 'protein_needs', 'fat_needs']
+        compact_fields = ['id', 'username', 'email', 'userLevel', 'profilePicture']
 
     def get_selected_workout_program(self, obj):
-        if obj.selected_workout_program:
-            if isinstance(obj.selected_workout_program, WorkoutProgram):
-                serializer = WorkoutProgramSerializer(obj.selected_workout_program)
-            elif isinstance(obj.selected_workout_program, UserCustomWorkoutProgram):
-                serializer = UserCustomWorkoutProgramSerializer(obj.selected_workout_program)
-            else:
-                return None
-
-            return {
-                "program_id": obj.selected_workout_program.pk,
-                "program_type": ContentType.objects.get_for_model(obj.selected_workout_program).model,
-                **serializer.data
-            }
-        return None
-
-class DailyUserProgressSerializer(serializers.ModelSerializer):
-    user = serializers.SlugRelatedField(slug_field='username', queryset=User.objects.all())
+        program = obj.selected_workout_program
+        if isinstance(program, WorkoutProgram):
+            serializer = WorkoutProgramSerializer(program)
+        elif isinstance(program, UserCustomWorkoutProgram):
+            serializer = UserCustomWorkoutProgramSerializer(program)
+        else:
+            return None
+
+        return {
+            "program_id": program.pk,
+            "program_type": program._meta.model_name,
+            **serializer.data
+        }
+
+class DailyUserProgressSerializer(FlexFieldsMixin, serializers.ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
     class Meta:
         model = DailyUserProgress
         fields = '__all__'
 
 
+class DailyUserProgressUpsertSerializer(DailyUserProgressSerializer):
+    date = serializers.DateField(default=timezone.localdate)
+
+    class Meta(DailyUserProgressSerializer.Meta):
+        validators = []
+
+    def create(self, validated_data):
+        update_fields = [name for name in validated_data if name not in ('user', 'date')]
+        progress = DailyUserProgress(**validated_data)
+        if update_fields:
+            DailyUserProgress.objects.bulk_create(
+                [progress], update_conflicts=True, unique_fields=['user', 'date'], update_fields=update_fields,
+            )
+        else:
+            DailyUserProgress.objects.bulk_create([progress], ignore_conflicts=True)
+        # bulk_create() sends no post_save signal, so refresh the rollups here.
+        ProgressRollup.refresh(validated_data['user'].pk, [validated_data['date']])
+        return DailyUserProgress.objects.get(user=validated_data['user'], date=validated_data['date'])
+
+
+class ProgressRollupSerializer(serializers.ModelSerializer):
+    averages = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProgressRollup
+        exclude = ['id', 'user']
+
+    def get_averages(self, obj):
+        return obj.get_averages()
+
+
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_token
+from .models import DailyUserProgress, ProgressRollup, User
+
+
+@receiver(post_save, sender=DailyUserProgress)
+def daily_progress_saved(sender, instance, **kwargs):
+    date = sender._meta.get_field('date').to_python(instance.date)
+    dates = {date, instance.__dict__.get('_loaded_date') or date}
+    ProgressRollup.refresh(instance.user_id, dates)
+    instance._loaded_date = date
+
+
+@receiver(post_delete, sender=DailyUserProgress)
+def daily_progress_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting users cascades to their rollups as well, so there is nothing to refresh.
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    ProgressRollup.refresh(instance.user_id, [instance._meta.get_field('date').to_python(instance.date)])
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which authentication does not use.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
@@ -1,4 +1,8 @@
 from django.utils import timezone
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from jsonschema import ValidationError
@@ -7,9 +11,11 @@ from rest_framework.test import APIClient,APITestCase
 from rest_framework.authtoken.models import Token
 from django.db import IntegrityError
 from django.contrib.contenttypes.models import ContentType
-from fitcom_app.models import UserCustomWorkoutProgram
+from fitcom_app.models import Exercise, Level, UserCustomWorkoutProgram, WorkoutProgram
+from rest_framework.exceptions import AuthenticationFailed
+from .authentication import CachingTokenAuthentication
 from .serializers import LoginSerializer
-from .models import User, DailyUserProgress
+from .models import User, DailyUserProgress, ProgressRollup
 from rest_framework.test import APITestCase
 
 
@@ -91,6 +97,34 @@ class UserModelTests(TestCase):
         user.calculate_needs()
         self.assertGreater(user.kcal_needs, initial_kcal)
 
+    def test_needs_are_calculated_on_save(self):
+        user = User.objects.create_user(
+            email='testuser@example.com', username='testuser', password='testpassword123',
+            weight=70.0, height=175.0, gender='male', userLevel='Moderate', age=30
+        )
+        self.assertIsNotNone(User.objects.get(pk=user.pk).kcal_needs)
+
+        user = User.objects.get(pk=user.pk)
+        initial_kcal = user.kcal_needs
+        user.weight = 80.0
+        user.save(update_fields=['weight'])
+        self.assertGreater(User.objects.get(pk=user.pk).kcal_needs, initial_kcal)
+
+    def test_needs_are_not_recalculated_when_inputs_are_unchanged(self):
+        User.objects.create_user(
+            email='testuser@example.com', username='testuser', password='testpassword123',
+            weight=70.0, height=175.0, gender='male', userLevel='Moderate', age=30
+        )
+        user = User.objects.get(email='testuser@example.com')
+        user.kcal_needs = 1234.0
+        user.username = 'renamed'
+        user.save()
+        self.assertEqual(User.objects.get(pk=user.pk).kcal_needs, 1234.0)
+
+    def test_needs_are_skipped_without_complete_inputs(self):
+        user = User.objects.create_user(email='testuser@example.com', username='testuser', password='testpassword123', weight=70.0)
+        self.assertIsNone(user.kcal_needs)
+
     def test_user_without_email_raises_error(self):
         with self.assertRaises(ValueError):
             User.objects.create_user(email='', username='testuser', password='testpassword123', weight=70.0, height=175.0, gender='male')
@@ -270,6 +304,42 @@ class UserAPITests(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(response.data['email'], 'testuser@example.com')
 
+        def test_user_me_query_count_is_fixed(self):
+            exercises = [Exercise.objects.create(name=f'Exercise {n}', level=Level.BEGINNER) for n in range(3)]
+            programs = []
+            for n in range(3):
+                program = UserCustomWorkoutProgram.objects.create(user=self.user, name=f'Program {n}', description='')
+                program.schedule.set(exercises)
+                programs.append(program)
+            self.user.saved_workout_programs.set(programs)
+            self.user.selected_workout_program = programs[0]
+            self.user.save()
+
+            self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.user_token.key)
+            # Content types are cached per process, so a warm worker never queries them.
+            ContentType.objects.get_for_models(WorkoutProgram, UserCustomWorkoutProgram)
+            # token + saved programs + their schedules + selected program + its schedule
+            with self.assertNumQueries(5):
+                response = self.client.get(reverse('user-me'), format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['saved_workout_programs']), 3)
+            self.assertEqual(len(response.data['saved_workout_programs'][2]['schedule']), 3)
+            selected = response.data['selected_workout_program']
+            self.assertEqual(selected['program_type'], 'usercustomworkoutprogram')
+            self.assertEqual(len(selected['schedule']), 3)
+
+        def test_user_me_with_admin_program_selected(self):
+            program = WorkoutProgram.objects.create(name='Admin Program', description='', is_admin_created=True)
+            program.schedule.set([Exercise.objects.create(name='Squat', level=Level.BEGINNER)])
+            self.user.selected_workout_program = program
+            self.user.save()
+
+            self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.user_token.key)
+            response = self.client.get(reverse('user-me'), format='json')
+            selected = response.data['selected_workout_program']
+            self.assertEqual(selected['program_type'], 'workoutprogram')
+            self.assertEqual(selected['schedule'][0]['name'], 'Squat')
+
 class AuthTests(APITestCase):
 
     def setUp(self):
@@ -394,6 +464,67 @@ class AuthTests(APITestCase):
         self.assertEqual(response.data['detail'], 'Invalid token.')
 
 
+    def test_logout_invalidates_cached_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.assertEqual(self.client.get(reverse('user-me'), format='json').status_code, status.HTTP_200_OK)
+        self.client.post(reverse('logout'), format='json')
+        response = self.client.get(reverse('user-me'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachingTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@example.com', username='testuser', password='testpassword123')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachingTokenAuthentication()
+
+    def test_warm_cache_costs_no_queries(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_deleted_token_is_rejected_by_every_worker(self):
+        # Workers share the cache, so the delete in one reaches the others.
+        other_worker = CachingTokenAuthentication()
+        other_worker.authenticate_credentials(self.token.key)
+        Token.objects.filter(key=self.token.key).delete()
+        with self.assertRaises(AuthenticationFailed):
+            other_worker.authenticate_credentials(self.token.key)
+
+    def test_cached_user_is_copied_per_request(self):
+        first, _ = self.authentication.authenticate_credentials(self.token.key)
+        first._prefetched_objects_cache = {'saved_workout_programs': []}
+        second, _ = self.authentication.authenticate_credentials(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertFalse(hasattr(second, '_prefetched_objects_cache'))
+
+    def test_user_save_invalidates_cached_token(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        self.user.weight = 81.5
+        self.user.save()
+        user, _ = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.weight, 81.5)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+
+    def test_expired_token_is_rejected_and_deleted(self):
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - timedelta(days=365))
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    def test_login_replaces_expired_token(self):
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - timedelta(days=365))
+        response = self.client.post(reverse('auth_login'), {'email': 'testuser@example.com', 'password': 'testpassword123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.json()['token'], self.token.key)
+
 class DailyUserProgressModelTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -437,6 +568,52 @@ class DailyUserProgressModelTests(TestCase):
         self.assertIn('kcal_diff', progress_vs_needs)
         self.assertIn('protein_diff', progress_vs_needs)
 
+    def test_get_progress_vs_needs_does_not_save_user(self):
+        progress = DailyUserProgress.objects.create(user=self.user, date=timezone.now().date(), kcal_consumed=2000.0)
+        progress = DailyUserProgress.objects.select_related('user').get(pk=progress.pk)
+        with CaptureQueriesContext(connection) as queries:
+            progress_vs_needs = progress.get_progress_vs_needs()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(progress_vs_needs['kcal_diff'], round(2000.0 - self.user.kcal_needs, 1))
+
+    def test_with_needs_diffs(self):
+        DailyUserProgress.objects.create(user=self.user, date=timezone.now().date(), kcal_consumed=2000.0, water_consumed=3.0)
+        progress = DailyUserProgress.objects.with_needs_diffs().get()
+        self.assertAlmostEqual(progress.kcal_diff, round(2000.0 - self.user.kcal_needs, 1))
+        self.assertAlmostEqual(progress.water_diff, round(3.0 - self.user.water_needs, 1))
+
+    def test_rollups_follow_daily_progress(self):
+        monday = date(2024, 3, 4)
+        for offset, workout in enumerate((True, True, False, True)):
+            DailyUserProgress.objects.create(
+                user=self.user, date=monday + timedelta(days=offset), workout_completed=workout, kcal_consumed=1000.0
+            )
+        week = ProgressRollup.objects.get(user=self.user, period=ProgressRollup.Period.WEEK, period_start=monday)
+        self.assertEqual((week.days_logged, week.workouts_completed, week.longest_workout_streak), (4, 3, 2))
+        self.assertEqual(week.kcal_consumed, 4000.0)
+
+        progress = DailyUserProgress.objects.get(user=self.user, date=monday + timedelta(days=3))
+        progress.date = monday + timedelta(days=7)
+        progress.save()
+        week.refresh_from_db()
+        self.assertEqual(week.days_logged, 3)
+        self.assertTrue(ProgressRollup.objects.filter(period=ProgressRollup.Period.WEEK, period_start=progress.date).exists())
+
+        progress.delete()
+        self.assertFalse(ProgressRollup.objects.filter(period=ProgressRollup.Period.WEEK, period_start=progress.date).exists())
+
+    def test_rebuild_rollups(self):
+        start = date(2024, 2, 26)
+        for offset in range(10):
+            DailyUserProgress.objects.create(
+                user=self.user, date=start + timedelta(days=offset), workout_completed=offset % 3 != 0, kcal_burned=100.0
+            )
+        fields = ['period', 'period_start', 'days_logged', 'workouts_completed', 'longest_workout_streak', 'kcal_burned']
+        maintained = list(ProgressRollup.objects.order_by('period', 'period_start').values_list(*fields))
+        ProgressRollup.objects.all().delete()
+        ProgressRollup.rebuild([self.user.pk], batch_size=2)
+        self.assertEqual(list(ProgressRollup.objects.order_by('period', 'period_start').values_list(*fields)), maintained)
+
     def test_unique_together_constraint(self):
         DailyUserProgress.objects.create(
             user=self.user,
@@ -499,6 +676,82 @@ class DailyUserProgressViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['kcal_consumed'], 2000.0)
 
+    def test_progress_vs_needs_range(self):
+        today = timezone.now().date()
+        for days_ago in range(3):
+            DailyUserProgress.objects.create(user=self.user, date=today - timedelta(days=days_ago), kcal_consumed=2000.0)
+        url = reverse('dailyuserprogress-progress-vs-needs')
+        query = f'?from={today - timedelta(days=1)}&to={today}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + query, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([entry['date'] for entry in response.data], [today - timedelta(days=1), today])
+        self.assertEqual(response.data[0]['kcal_diff'], round(2000.0 - self.user.kcal_needs, 1))
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+    def test_list_is_scoped_to_request_user(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpassword123')
+        DailyUserProgress.objects.create(user=other, date=timezone.now().date())
+        mine = DailyUserProgress.objects.create(user=self.user, date=timezone.now().date())
+        response = self.client.get(reverse('dailyuserprogress-list'), format='json')
+        self.assertEqual([entry['id'] for entry in response.data['results']], [mine.id])
+
+        other_progress = DailyUserProgress.objects.get(user=other)
+        response = self.client.get(reverse('dailyuserprogress-detail', args=[other_progress.id]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_date_range(self):
+        today = timezone.now().date()
+        for days_ago in range(5):
+            DailyUserProgress.objects.create(user=self.user, date=today - timedelta(days=days_ago))
+        url = reverse('dailyuserprogress-list') + f'?from={today - timedelta(days=3)}&to={today - timedelta(days=1)}'
+        response = self.client.get(url, format='json')
+        self.assertEqual(
+            [entry['date'] for entry in response.data['results']],
+            [str(today - timedelta(days=days_ago)) for days_ago in (1, 2, 3)],
+        )
+
+    def test_upsert_creates_then_updates(self):
+        url = reverse('dailyuserprogress-upsert')
+        response = self.client.post(url, {'kcal_consumed': 500.0, 'water_consumed': 1.0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['date'], str(timezone.localdate()))
+
+        response = self.client.post(url, {'kcal_consumed': 1500.0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        progress = DailyUserProgress.objects.get()
+        self.assertEqual(progress.user, self.user)
+        self.assertEqual(progress.kcal_consumed, 1500.0)
+        self.assertEqual(progress.water_consumed, 1.0)
+
+    def test_progress_vs_needs_invalid_date(self):
+        response = self.client.get(reverse('dailyuserprogress-progress-vs-needs') + '?from=yesterday', format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upsert_refreshes_rollups(self):
+        self.client.post(reverse('dailyuserprogress-upsert'), {'kcal_consumed': 500.0}, format='json')
+        self.client.post(reverse('dailyuserprogress-upsert'), {'kcal_consumed': 1500.0}, format='json')
+        rollup = ProgressRollup.objects.get(user=self.user, period=ProgressRollup.Period.MONTH)
+        self.assertEqual(rollup.kcal_consumed, 1500.0)
+        self.assertEqual(rollup.days_logged, 1)
+
+    def test_summary(self):
+        for day, kcal in ((date(2024, 1, 29), 2000.0), (date(2024, 1, 31), 1000.0), (date(2024, 2, 5), 1800.0)):
+            DailyUserProgress.objects.create(user=self.user, date=day, kcal_consumed=kcal)
+        url = reverse('dailyuserprogress-summary')
+
+        response = self.client.get(url + '?period=month&from=2024-01-15&to=2024-02-10', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([bucket['period_start'] for bucket in response.data], ['2024-01-01', '2024-02-01'])
+        self.assertEqual(response.data[0]['kcal_consumed'], 3000.0)
+        self.assertEqual(response.data[0]['averages']['kcal_consumed'], 1500.0)
+
+        response = self.client.get(url + '?from=2024-01-31&to=2024-02-01', format='json')
+        self.assertEqual([bucket['period_start'] for bucket in response.data], ['2024-01-29'])
+
+        response = self.client.get(url + '?period=year', format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_progress_without_authentication(self):
         self.client.credentials()
         url = reverse('dailyuserprogress-list')
@@ -5,13 +5,25 @@ from rest_framework.views import APIView
 from rest_framework.permissions import BasePermission
 from rest_framework.decorators import action
 from django.contrib.auth import authenticate
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
 from rest_framework.authtoken.models import Token
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import User, DailyUserProgress
-from .serializers import RegisterSerializer, UserSerializer, LoginSerializer, DailyUserProgressSerializer
+from . import rollups
+from .authentication import token_expired
+from .models import User, DailyUserProgress, ProgressRollup
+from .serializers import (
+    RegisterSerializer, UserSerializer, LoginSerializer, DailyUserProgressSerializer, DailyUserProgressUpsertSerializer,
+    ProgressRollupSerializer,
+)
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from fitcom_app.mixins import CompactListMixin
+from fitcom_app.models import WorkoutProgram, UserCustomWorkoutProgram
+from fitcom_app.pagination import DailyUserProgressPagination, UserPagination
 
 class IsOwnerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -56,6 +68,9 @@ class LoginView(APIView):
         user = authenticate(email=email, password=password)
         if user is not None:
             token, created = Token.objects.get_or_create(user=user)
+            if not created and token_expired(token):
+                token.delete()
+                token = Token.objects.create(user=user)
             return Response({
                 "message": "Login successful",
                 "token": token.key,
@@ -77,9 +92,30 @@ class LogoutView(APIView):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
+    pagination_class = UserPagination
+
+    @staticmethod
+    def get_profile_prefetches():
+        """
+        Loads the selected and saved programs with their schedules in a fixed
+        number of queries, whatever the number of saved programs.
+        """
+        return [
+            Prefetch('saved_workout_programs', queryset=UserCustomWorkoutProgram.objects.prefetch_related('schedule')),
+            GenericPrefetch('selected_workout_program', [
+                WorkoutProgram.objects.prefetch_related('schedule'),
+                UserCustomWorkoutProgram.objects.prefetch_related('schedule'),
+            ]),
+        ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            queryset = queryset.prefetch_related(*self.get_profile_prefetches())
+        return queryset
 
     def get_permissions(self):
         if self.action in ['retrieve', 'update', 'partial_update', 'me']:
@@ -95,6 +131,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
+        prefetch_related_objects([request.user], *self.get_profile_prefetches())
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
@@ -104,3 +141,89 @@ class UserViewSet(viewsets.ModelViewSet):
 class DailyUserProgressViewSet(viewsets.ModelViewSet):
     queryset = DailyUserProgress.objects.all()
     serializer_class = DailyUserProgressSerializer
+    pagination_class = DailyUserProgressPagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return DailyUserProgress.objects.none()
+        # Every lookup is prefixed by the user, so it is served by the
+        # (user, date) unique index regardless of the table size.
+        return DailyUserProgress.objects.filter(user=self.request.user, **self.get_date_range())
+
+    def get_date_param(self, param):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({param: 'Enter a date in YYYY-MM-DD format.'})
+        return parsed
+
+    def get_date_range(self):
+        date_range = {}
+        for param, lookup in (('from', 'date__gte'), ('to', 'date__lte')):
+            value = self.get_date_param(param)
+            if value is not None:
+                date_range[lookup] = value
+        return date_range
+
+    date_range_parameters = [
+        openapi.Parameter('from', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('to', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+    ]
+
+    @swagger_auto_schema(manual_parameters=date_range_parameters)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(manual_parameters=date_range_parameters)
+    @action(detail=False, methods=['get'], url_path='progress-vs-needs')
+    def progress_vs_needs(self, request):
+        diffs = (
+            self.get_queryset()
+            .with_needs_diffs()
+            .order_by('date')
+            .values('date', 'kcal_diff', 'protein_diff', 'carbs_diff', 'fat_diff', 'water_diff')
+        )
+        return Response(list(diffs))
+
+    @swagger_auto_schema(
+        manual_parameters=date_range_parameters + [
+            openapi.Parameter('period', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=ProgressRollup.Period.values),
+        ],
+        responses={200: ProgressRollupSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'], serializer_class=ProgressRollupSerializer)
+    def summary(self, request):
+        """
+        Weekly (default) or monthly totals, averages and workout streaks, read
+        from the pre-aggregated rollups. `from` and `to` select the buckets
+        that overlap the range.
+        """
+        period = request.query_params.get('period', ProgressRollup.Period.WEEK)
+        if period not in ProgressRollup.Period.values:
+            raise ValidationError({'period': f'Choose one of {", ".join(ProgressRollup.Period.values)}.'})
+
+        summaries = ProgressRollup.objects.filter(user=request.user, period=period)
+        start, end = self.get_date_param('from'), self.get_date_param('to')
+        if start is not None:
+            summaries = summaries.filter(period_start__gte=rollups.period_start(period, start))
+        if end is not None:
+            summaries = summaries.filter(period_start__lte=end)
+        return Response(self.get_serializer(summaries, many=True).data)
+
+    @swagger_auto_schema(request_body=DailyUserProgressUpsertSerializer, responses={200: DailyUserProgressSerializer})
+    @action(detail=False, methods=['post'], serializer_class=DailyUserProgressUpsertSerializer)
+    def upsert(self, request):
+        """
+        Creates or overwrites the entry for `date` (today by default) in a
+        single INSERT ... ON CONFLICT statement. Only the fields sent are
+        overwritten on an existing entry.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        progress = serializer.save()
+        return Response(DailyUserProgressSerializer(progress, context=self.get_serializer_context()).data)
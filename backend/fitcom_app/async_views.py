@@ -0,0 +1,167 @@
+"""
+Async counterparts of the hottest read endpoints, mounted under /api/async/.
+
+Under an ASGI server (see gunicorn.conf.py) a request waiting on a slow mobile
+connection or on the database only holds an event-loop task, not a worker
+thread. The responses match the DRF viewsets they shadow: same serializers,
+keyset pagination, compact lists, ETag validators and permissions. Only
+token authentication is supported, as that is all the app uses.
+
+The mobile app does not call these routes yet; they are meant to be switched
+to once the deployment runs under ASGI.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, aprefetch_related_objects
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.request import Request
+from accounts.authentication import CachingTokenAuthentication
+from accounts.serializers import UserSerializer
+from accounts.views import UserViewSet
+from .cache import catalogue_cache_key
+from .filters import ExerciseFilter
+from .metrics import timed_serialization
+from .mixins import get_validators, set_validator_headers
+from .models import Exercise, Post, WorkoutProgram
+from .pagination import ExercisePagination, PostPagination, WorkoutProgramPagination
+from .renderers import ORJSONRenderer
+from .serializers import ExerciseSerializer, PostSerializer, WorkoutProgramSerializer
+
+
+class AsyncReadView(View):
+    """
+    Authenticates the token, checks `permission_classes` like the viewset it
+    shadows, then renders what the async `get` returns as JSON.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication = CachingTokenAuthentication()
+    permission_classes = [IsAuthenticated]
+    renderer = ORJSONRenderer()
+    media_type = 'application/json'
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Serializers and paginators expect DRF's request (query_params etc.).
+        self.request = Request(request)
+        try:
+            authenticated = await sync_to_async(self.authentication.authenticate)(request)
+            self.request.user, self.request.auth = authenticated or (AnonymousUser(), None)
+            self.check_permissions(self.request)
+            return await super().dispatch(self.request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.render(self.error_data(exc), exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+            return response
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.auth is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def error_data(self, exc):
+        return exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        with timed_serialization():
+            content = self.renderer.render(data)
+        return HttpResponse(content, status=status_code, content_type=self.media_type)
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
+
+
+class AsyncListView(AsyncReadView):
+    """
+    A compact, keyset-paginated list answered with 304 Not Modified when the
+    client's ETag still matches. Like ConditionalGetMixin lists, it sends no
+    Last-Modified.
+    """
+    queryset = None
+    serializer_class = None
+    pagination_class = None
+    filter_backends = []
+    last_modified_field = 'updated_at'
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get_validator_extra(self):
+        return ''
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'compact': True}
+
+    async def get(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        stamp = await queryset.order_by().aaggregate(last_modified=Max(self.last_modified_field), count=Count('pk'))
+        etag, _ = get_validators(
+            request, self.media_type, stamp['last_modified'], stamp['count'], await self.get_validator_extra()
+        )
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await self.build_response(queryset, etag)
+        set_validator_headers(response, etag, None)
+        return response
+
+    async def build_response(self, queryset, etag):
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+        serializer = self.serializer_class(page, many=True, context=self.get_serializer_context())
+        return self.render(paginator.get_paginated_response(serializer.data).data)
+
+
+class ExerciseListView(AsyncListView):
+    queryset = Exercise.objects.all()
+    serializer_class = ExerciseSerializer
+    pagination_class = ExercisePagination
+    filter_backends = [ExerciseFilter]
+
+    async def build_response(self, queryset, etag):
+        key = await sync_to_async(catalogue_cache_key)(etag)
+        cached = await cache.aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = await super().build_response(queryset, etag)
+        await cache.aset(key, (response.content, response['Content-Type']), settings.CATALOGUE_CACHE_TIMEOUT)
+        return response
+
+
+class WorkoutProgramListView(AsyncListView):
+    permission_classes = [AllowAny]
+    queryset = WorkoutProgram.objects.filter(is_admin_created=True).prefetch_related('schedule')
+    serializer_class = WorkoutProgramSerializer
+    pagination_class = WorkoutProgramPagination
+
+    async def get_validator_extra(self):
+        # Programs embed their exercises, so catalogue edits must change the ETag too.
+        stamp = await Exercise.objects.aaggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return f"{stamp['count']}:{stamp['last_modified']}"
+
+
+class PostListView(AsyncListView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    queryset = Post.objects.select_related('author').with_comment_preview()
+    serializer_class = PostSerializer
+    pagination_class = PostPagination
+
+
+class MeView(AsyncReadView):
+    async def get(self, request):
+        user = request.user
+        await aprefetch_related_objects([user], *UserViewSet.get_profile_prefetches())
+        return self.render(UserSerializer(user, context=self.get_serializer_context()).data)
@@ -0,0 +1,49 @@
+"""Timing helpers and safety checks shared by the benchmark management commands."""
+import math
+import time
+from contextlib import contextmanager
+from django.core.management.base import CommandError
+from django.db import connection
+
+LOCAL_HOSTS = {'', 'localhost', '127.0.0.1', '::1'}
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list of numbers."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarise(samples):
+    """Latency statistics, in milliseconds, for a list of durations in seconds."""
+    return {
+        'requests': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 2),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+    }
+
+
+@contextmanager
+def timer(samples):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
+
+
+def is_local_database():
+    """SQLite, or a server on this machine (loopback or a Unix socket)."""
+    host = connection.settings_dict.get('HOST') or ''
+    return connection.vendor == 'sqlite' or host in LOCAL_HOSTS or host.startswith('/')
+
+
+def require_local_database(allow_remote):
+    """Commands that write benchmark data refuse remote databases unless --allow-remote is given."""
+    if not allow_remote and not is_local_database():
+        raise CommandError(
+            f"Refusing to write benchmark data to the database at {connection.settings_dict['HOST']}; "
+            'point DATABASE_URL at a local database or pass --allow-remote.'
+        )
@@ -0,0 +1,79 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from .compression import available_encodings, compress
+from .models import Exercise, current_change_version
+from .renderers import ORJSONRenderer
+from .serializers import ExerciseSerializer
+
+CATALOGUE_VERSION_KEY = 'exercises:catalogue-version'
+# build_catalogue_bundle runs offline, so it spends the CPU on the best ratio.
+# A request that finds no bundle for the current catalogue builds one at the
+# levels of per-request compression instead.
+BUNDLE_LEVELS = {'br': 11, 'gzip': 9}
+REQUEST_BUNDLE_LEVELS = {'br': settings.BROTLI_QUALITY, 'gzip': 6}
+
+
+def get_catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """
+    Start a new catalogue version. Bumped immediately and again on commit, so a
+    reader that cached pre-commit data under the first bump is discarded too.
+    """
+    def bump():
+        cache.set(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def catalogue_cache_key(etag):
+    """The ETag already covers the URL, media type and a MAX/COUNT stamp of the rows."""
+    return f'exercises:{get_catalogue_version()}:{etag.strip(chr(34))}'
+
+
+def catalogue_bundle_key():
+    """
+    Keyed on MAX(change_version)/COUNT of the exercises: every save takes a new
+    change version and every delete lowers the count, whichever process wrote.
+    """
+    stamp = Exercise.objects.aggregate(version=Max('change_version'), count=Count('pk'))
+    return f"exercises:bundle:{stamp['version'] or 0}:{stamp['count']}"
+
+
+def build_catalogue_bundle(levels):
+    """
+    The whole catalogue as JSON, precompressed with every available coding,
+    and the change version it is current to, for the ?since= change feed.
+    """
+    # Like the change feed, read the version before the rows.
+    version = current_change_version()
+    exercises = Exercise.objects.order_by('name', 'exercise_id')
+    content = ORJSONRenderer().render(ExerciseSerializer(exercises, many=True).data)
+    encodings = {'identity': content}
+    for coding in available_encodings():
+        encodings[coding] = compress(content, coding, levels[coding])
+    return {'etag': hashlib.md5(content).hexdigest(), 'encodings': encodings, 'version': version}
+
+
+def rebuild_catalogue_bundle(levels=BUNDLE_LEVELS):
+    # The key is read first; rows written meanwhile only make the bundle newer than it.
+    key = catalogue_bundle_key()
+    bundle = build_catalogue_bundle(levels)
+    cache.set(key, bundle, settings.CATALOGUE_CACHE_TIMEOUT)
+    return bundle
+
+
+def get_catalogue_bundle():
+    """The bundle of the current catalogue, built at the per-request levels if no one has stored it yet."""
+    return cache.get(catalogue_bundle_key()) or rebuild_catalogue_bundle(REQUEST_BUNDLE_LEVELS)
@@ -0,0 +1,50 @@
+"""Content-Encoding helpers shared by CompressionMiddleware and the catalogue bundle."""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Optional; without it only gzip is offered.
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'application/yaml')
+
+
+def available_encodings():
+    """Supported codings in order of preference."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return media_type.startswith('text/') or media_type.endswith('+json') or media_type in COMPRESSIBLE_TYPES
+
+
+def accepted_encodings(request):
+    """The codings the client accepts, ignoring those it refuses with q=0."""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip().removeprefix('q=')
+        try:
+            refused = params and float(q) == 0
+        except ValueError:
+            refused = False
+        if coding and not refused:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def negotiate_encoding(request, offered=None):
+    """The preferred coding the client accepts, or None for identity."""
+    accepted = accepted_encodings(request)
+    for coding in offered or available_encodings():
+        if coding in accepted or '*' in accepted:
+            return coding
+    return None
+
+
+def compress(content, coding, level):
+    """`level` is a brotli quality (0-11) for br and a zlib level (1-9) for gzip."""
+    if coding == 'br':
+        return brotli.compress(content, quality=level)
+    return gzip.compress(content, compresslevel=level, mtime=0)
@@ -0,0 +1,28 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import Level
+
+
+class ExerciseFilter(BaseFilterBackend):
+    """
+    ?body_part=chest&equipment=dumbbell&level=Beginner&search=press
+
+    Exact matches line up with the composite indexes on Exercise; `search`
+    is a case-insensitive name match served by the trigram index on Postgres.
+    """
+    exact_fields = ('body_part', 'target', 'equipment', 'level')
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        level = params.get('level')
+        if level and level not in Level.values:
+            raise ValidationError({'level': f'"{level}" is not a valid choice.'})
+
+        filters = {field: params[field] for field in self.exact_fields if params.get(field)}
+        if filters:
+            queryset = queryset.filter(**filters)
+        search = params.get(self.search_param, '').strip()
+        if search:
+            queryset = queryset.filter(name__icontains=search)
+        return queryset
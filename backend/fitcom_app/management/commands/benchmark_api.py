@@ -0,0 +1,152 @@
+import json
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from fitcom_app.benchmark import require_local_database, summarise, timer
+from fitcom_app.models import Post
+from .seed_benchmark import BENCHMARK_EMAIL_DOMAIN, BENCHMARK_PASSWORD, benchmark_users
+
+FLOWS = ['register', 'login', 'me', 'exercises', 'programs', 'feed', 'comment', 'progress_upsert']
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the core API flows in-process against data from seed_benchmark and report latency '
+        'percentiles, requests per second and queries per request. With --baseline it fails when a '
+        'flow got slower than --tolerance allows or issues an extra query per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100, help='Measured requests per flow.')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per flow, to fill caches.')
+        parser.add_argument('--flow', action='append', choices=FLOWS, dest='flows', help='Repeat to pick flows; default all.')
+        parser.add_argument('--sample-users', type=int, default=100, help='Distinct seeded users to spread requests over.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON, e.g. to use as the next baseline.')
+        parser.add_argument('--baseline', help='Results JSON from an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=20.0, help='Allowed p95 slowdown in percent.')
+        parser.add_argument('--allow-remote', action='store_true', help='Run even if the database is not local.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be positive.')
+        require_local_database(options['allow_remote'])
+        users = list(benchmark_users().order_by('pk')[:options['sample_users']])
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+        if not users or not post_ids:
+            raise CommandError('No benchmark data; run seed_benchmark first.')
+
+        self.rng = random.Random(options['seed'])
+        self.users = users
+        self.post_ids = post_ids
+        self.tokens = {user.pk: Token.objects.get_or_create(user=user)[0].key for user in users}
+        self.client = Client(raise_request_exception=False)
+
+        results = {}
+        for flow in options['flows'] or FLOWS:
+            request = getattr(self, f'request_{flow}')
+            for _ in range(options['warmup']):
+                request()
+            results[flow] = self.measure(request, options['iterations'])
+            self.report(flow, results[flow])
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+        if options['baseline']:
+            self.check_regressions(results, options['baseline'], options['tolerance'])
+
+    def measure(self, request, iterations):
+        samples, queries, errors = [], 0, 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured, timer(samples):
+                response = request()
+            queries += len(captured)
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+        return {
+            **summarise(samples),
+            'requests_per_second': round(iterations / elapsed, 1),
+            'queries_per_request': round(queries / iterations, 2),
+            'errors': errors,
+        }
+
+    def report(self, flow, stats):
+        self.stdout.write(
+            f"{flow:<16} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms  "
+            f"{stats['requests_per_second']:>8.1f} req/s  {stats['queries_per_request']:>6.2f} queries/req  "
+            f"{stats['errors']} errors"
+        )
+
+    def check_regressions(self, results, baseline_path, tolerance):
+        with open(baseline_path) as fp:
+            baseline = json.load(fp)
+        regressions = []
+        for flow, stats in results.items():
+            if stats['errors']:
+                regressions.append(f"{flow}: {stats['errors']} failed requests")
+            before = baseline.get(flow)
+            if before is None:
+                continue
+            if stats['p95_ms'] > before['p95_ms'] * (1 + tolerance / 100):
+                regressions.append(f"{flow}: p95 {before['p95_ms']} ms -> {stats['p95_ms']} ms")
+            # Cache hits make the average wobble; a real N+1 adds whole queries.
+            if stats['queries_per_request'] >= before['queries_per_request'] + 1:
+                regressions.append(
+                    f"{flow}: queries per request {before['queries_per_request']} -> {stats['queries_per_request']}"
+                )
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def auth(self, user=None):
+        user = user or self.rng.choice(self.users)
+        return {'HTTP_AUTHORIZATION': f'Token {self.tokens[user.pk]}'}
+
+    def request_register(self):
+        return self.client.post(reverse('auth_register'), {
+            'email': f'register-{uuid.uuid4().hex}@{BENCHMARK_EMAIL_DOMAIN}',
+            'username': 'bench-register',
+            'password': BENCHMARK_PASSWORD,
+            'weight': 75.0, 'height': 180.0, 'age': 30, 'gender': 'male', 'userLevel': 'Moderate',
+        }, content_type='application/json')
+
+    def request_login(self):
+        user = self.rng.choice(self.users)
+        return self.client.post(
+            reverse('auth_login'), {'email': user.email, 'password': BENCHMARK_PASSWORD}, content_type='application/json'
+        )
+
+    def request_me(self):
+        return self.client.get(reverse('user-me'), **self.auth())
+
+    def request_exercises(self):
+        return self.client.get(reverse('exercise-list'), **self.auth())
+
+    def request_programs(self):
+        return self.client.get(reverse('workoutprogram-list'), **self.auth())
+
+    def request_feed(self):
+        return self.client.get(reverse('post-list'), **self.auth())
+
+    def request_comment(self):
+        user = self.rng.choice(self.users)
+        return self.client.post(
+            reverse('comment-list'),
+            {'post_id': str(self.rng.choice(self.post_ids)), 'author': user.pk, 'content': 'Benchmark comment'},
+            content_type='application/json', **self.auth(user),
+        )
+
+    def request_progress_upsert(self):
+        return self.client.post(
+            reverse('dailyuserprogress-upsert'),
+            {'kcal_consumed': round(self.rng.uniform(1200, 3500), 1), 'water_consumed': 2.0},
+            content_type='application/json', **self.auth(),
+        )
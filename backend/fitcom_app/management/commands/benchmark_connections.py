@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+from fitcom_app.benchmark import summarise, timer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request latency of /auth/login/ and /api/exercises/ when every request opens a new '
+        'database connection against the configured persistent connections or pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='An existing account to log in with.')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint and mode.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be positive.')
+
+        self.opened = 0
+        connection_created.connect(self.count_connection)
+        try:
+            client = Client()
+            credentials = {'email': options['email'], 'password': options['password']}
+            response = client.post(reverse('auth_login'), credentials, content_type='application/json')
+            if response.status_code != 200:
+                raise CommandError(f'Login failed with {response.status_code}: {response.content[:200]!r}')
+            client.defaults['HTTP_AUTHORIZATION'] = f"Token {response.json()['token']}"
+
+            endpoints = [
+                ('POST /auth/login/', lambda: client.post(reverse('auth_login'), credentials, content_type='application/json')),
+                ('GET /api/exercises/', lambda: client.get(reverse('exercise-list'))),
+            ]
+            for mode, before_request in (('new connection', self.disconnect), ('configured', lambda: None)):
+                for label, request in endpoints:
+                    self.report(mode, label, self.run(request, before_request, options['requests']))
+        finally:
+            connection_created.disconnect(self.count_connection)
+
+    def count_connection(self, sender, connection, **kwargs):
+        self.opened += 1
+
+    def disconnect(self):
+        """Drop the connection, and the pool if any, so the next request connects from scratch."""
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
+        connection.close()
+
+    def run(self, request, before_request, count):
+        # The test client keeps connections open between requests, so apply
+        # the end-of-request cleanup (CONN_MAX_AGE, pool return) by hand.
+        samples = []
+        self.opened = 0
+        for _ in range(count):
+            before_request()
+            with timer(samples):
+                response = request()
+                close_old_connections()
+            if response.status_code >= 400:
+                raise CommandError(f'Request failed with {response.status_code}.')
+        return {**summarise(samples), 'connections_opened': self.opened}
+
+    def report(self, mode, label, stats):
+        self.stdout.write(
+            f"{mode:<15} {label:<20} mean {stats['mean_ms']:>8.2f} ms  p50 {stats['p50_ms']:>8.2f} ms  "
+            f"p95 {stats['p95_ms']:>8.2f} ms  connections opened {stats['connections_opened']}"
+        )
@@ -0,0 +1,71 @@
+import io
+import json
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from fitcom_app.benchmark import summarise, timer
+from fitcom_app.models import Exercise
+from fitcom_app.parsers import ORJSONParser
+from fitcom_app.renderers import ORJSONRenderer, orjson
+from fitcom_app.serializers import ExerciseSerializer
+from .import_exercises import catalogue_fields
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF\'s JSONRenderer/JSONParser with the orjson-backed ones on the exercise catalogue: '
+        'the serialized API payload, and raw rows with UUID and datetime values.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(Path(settings.BASE_DIR) / 'exercises.json'))
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, path, iterations, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; ORJSONRenderer is falling back to JSONRenderer.')
+        try:
+            with open(path) as fp:
+                entries = json.load(fp)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+        now = timezone.now()
+        rows = [{'exercise_id': uuid.uuid4(), **catalogue_fields(entry), 'updated_at': now} for entry in entries]
+        payloads = {
+            'api': ExerciseSerializer([Exercise(**row) for row in rows], many=True).data,
+            'native': rows,
+        }
+        self.stdout.write(f'{len(entries)} exercises, {iterations} iterations')
+
+        for name, data in payloads.items():
+            expected = JSONRenderer().render(data)
+            # Raw datetimes keep their microseconds under orjson.
+            if name == 'api' and ORJSONRenderer().render(data) != expected:
+                raise CommandError('The renderers disagree on the API payload.')
+            self.stdout.write(f'{name} payload ({len(expected) / 1024:.0f} KiB)')
+            self.compare('render', iterations, JSONRenderer().render, ORJSONRenderer().render, data)
+            self.compare(
+                'parse', iterations,
+                lambda body: JSONParser().parse(io.BytesIO(body)),
+                lambda body: ORJSONParser().parse(io.BytesIO(body)),
+                expected,
+            )
+
+    def compare(self, label, iterations, baseline, candidate, argument):
+        results = []
+        for function in (baseline, candidate):
+            samples = []
+            for _ in range(iterations):
+                with timer(samples):
+                    function(argument)
+            results.append(summarise(samples))
+        stdlib, fast = results
+        self.stdout.write(
+            f"  {label:<6} json p50 {stdlib['p50_ms']:>8.2f} ms  orjson p50 {fast['p50_ms']:>8.2f} ms  "
+            f"{stdlib['mean_ms'] / fast['mean_ms']:>5.1f}x faster"
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from fitcom_app.cache import rebuild_catalogue_bundle
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the precompressed exercise catalogue bundle served at /api/exercises/bundle/ at the best '
+        'compression levels and store it in the cache. Otherwise the first request after a catalogue change '
+        'builds it at per-request levels; run this after deploys and imports.'
+    )
+
+    def handle(self, *args, **options):
+        bundle = rebuild_catalogue_bundle()
+        for coding, content in bundle['encodings'].items():
+            self.stdout.write(f'{coding:<9} {len(content) / 1024:>8.1f} KiB')
+        self.stdout.write(self.style.SUCCESS(f"Stored catalogue bundle {bundle['etag']}."))
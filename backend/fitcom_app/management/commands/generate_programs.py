@@ -0,0 +1,87 @@
+import random
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+from fitcom_app.models import Exercise, Level, WorkoutProgram, change_batch, level_from_counts
+
+COUNT_FIELDS = {
+    Level.BEGINNER: 'beginner_count',
+    Level.INTERMEDIATE: 'intermediate_count',
+    Level.EXPERT: 'expert_count',
+}
+
+
+class Command(BaseCommand):
+    help = 'Generate random admin workout programs from the exercise catalogue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=50)
+        parser.add_argument('--min-groups', type=int, default=3, help='Fewest muscle groups per program.')
+        parser.add_argument('--max-groups', type=int, default=5, help='Most muscle groups per program.')
+        parser.add_argument('--min-per-group', type=int, default=1, help='Fewest exercises per muscle group.')
+        parser.add_argument('--max-per-group', type=int, default=2, help='Most exercises per muscle group.')
+        parser.add_argument(
+            '--level', action='append', choices=Level.values, dest='levels',
+            help='Target level; repeat to mix levels. Programs only draw exercises of their target level.',
+        )
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--clear', action='store_true', help='Delete existing workout programs first.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not 0 < options['min_groups'] <= options['max_groups']:
+            raise CommandError('--min-groups must be positive and not above --max-groups.')
+        if not 0 < options['min_per_group'] <= options['max_per_group']:
+            raise CommandError('--min-per-group must be positive and not above --max-per-group.')
+
+        rng = random.Random(options['seed'])
+        levels = {}
+        pool = defaultdict(lambda: defaultdict(list))
+        for pk, body_part, level in Exercise.objects.values_list('pk', 'body_part', 'level'):
+            levels[pk] = level
+            pool[level][body_part].append(pk)
+            pool[None][body_part].append(pk)
+        if not levels:
+            raise CommandError('The exercise catalogue is empty; run import_exercises first.')
+
+        programs, schedules = [], []
+        for _ in range(options['count']):
+            target = rng.choice(options['levels']) if options['levels'] else None
+            groups = pool[target]
+            if not groups:
+                raise CommandError(f'No {target} exercises in the catalogue.')
+            chosen = rng.sample(sorted(groups), min(len(groups), rng.randint(options['min_groups'], options['max_groups'])))
+
+            schedule = set()
+            for group in chosen:
+                per_group = rng.randint(options['min_per_group'], options['max_per_group'])
+                schedule.update(rng.sample(groups[group], min(per_group, len(groups[group]))))
+
+            counts = dict.fromkeys(COUNT_FIELDS.values(), 0)
+            for exercise_id in schedule:
+                counts[COUNT_FIELDS[levels[exercise_id]]] += 1
+            programs.append(WorkoutProgram(
+                name=f"Random Program {rng.randint(1, 1000000)}",
+                description="A randomly generated workout program",
+                level=level_from_counts(**counts),
+                **counts,
+            ))
+            schedules.append(schedule)
+
+        through = WorkoutProgram.schedule.through
+        with change_batch() as version:
+            if options['clear']:
+                WorkoutProgram.objects.all().delete()
+            # bulk_create skips WorkoutProgram.save(), which stamps the change version.
+            for program in programs:
+                program.change_version = version
+            WorkoutProgram.objects.bulk_create(programs, batch_size=options['batch_size'])
+            rows = [
+                through(workoutprogram_id=program.pk, exercise_id=exercise_id)
+                for program, schedule in zip(programs, schedules)
+                for exercise_id in schedule
+            ]
+            through.objects.bulk_create(rows, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(programs)} workout programs with {len(rows)} scheduled exercises.'
+        ))
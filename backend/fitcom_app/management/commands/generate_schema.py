@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from fitcom_project.schema import CODECS, code_version, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema (swagger.json and swagger.yaml) for the current code version into '
+        'SCHEMA_ROOT. Run it at build time so workers serve the file instead of generating the schema themselves.'
+    )
+
+    def handle(self, *args, **options):
+        for format in CODECS:
+            path = write_schema(format)
+            self.stdout.write(f'{path} ({path.stat().st_size / 1024:.1f} KiB)')
+        self.stdout.write(self.style.SUCCESS(f'Wrote the schema for code version {code_version()[:12]}.'))
@@ -0,0 +1,142 @@
+import json
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from fitcom_app.cache import bump_catalogue_version
+from fitcom_app.models import Exercise, WorkoutProgram, UserCustomWorkoutProgram, change_batch, next_change_version
+
+CATALOGUE_FIELDS = ['name', 'body_part', 'equipment', 'gif_url', 'target', 'secondary_muscles', 'instructions', 'level']
+# Tell apart legacy rows that share a name (the catalogue repeats a few names).
+LEGACY_MATCH_FIELDS = ['body_part', 'equipment', 'target']
+
+
+def iter_json_array(fp, chunk_size=64 * 1024):
+    """Yield the items of a top-level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer, started, eof = '', False, False
+    while True:
+        buffer = buffer.lstrip()
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise CommandError('Malformed exercise catalogue: expected a JSON array.')
+            buffer, started = buffer[1:].lstrip(), True
+        if started and buffer[:1] == ',':
+            buffer = buffer[1:].lstrip()
+        if started and buffer[:1] == ']':
+            return
+        if started and buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                end = None
+            if end is not None and (end < len(buffer) or eof):
+                yield item
+                buffer = buffer[end:]
+                continue
+        if eof:
+            raise CommandError('Malformed exercise catalogue: unexpected end of file.')
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def catalogue_fields(entry):
+    return {
+        'name': entry['name'],
+        'body_part': entry['bodyPart'],
+        'equipment': entry['equipment'],
+        'gif_url': entry['gifUrl'],
+        'target': entry['target'],
+        'secondary_muscles': entry['secondaryMuscles'],
+        'instructions': entry['instructions'],
+        'level': entry['level'],
+    }
+
+
+def adopt_legacy(candidates, fields):
+    """Take the legacy row that best matches `fields` out of `candidates` and return it."""
+    row = next(
+        (row for row in candidates if all(row[name] == fields[name] for name in LEGACY_MATCH_FIELDS)),
+        candidates[0],
+    )
+    candidates.remove(row)
+    return row
+
+
+class Command(BaseCommand):
+    help = 'Upsert the exercise catalogue from exercises.json, keeping existing primary keys.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(Path(settings.BASE_DIR) / 'exercises.json'))
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, path, batch_size, **options):
+        if not Path(path).exists():
+            raise CommandError(f'{path} not found.')
+
+        with open(path, encoding='utf-8') as fp, change_batch():
+            stats = self.import_catalogue(iter_json_array(fp), batch_size)
+            if stats['inserted'] or stats['updated']:
+                bump_catalogue_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            '{inserted} inserted, {updated} updated, {unchanged} unchanged'.format(**stats)
+        ))
+
+    def import_catalogue(self, entries, batch_size):
+        existing = {
+            row.pop('source_id'): row
+            for row in Exercise.objects.filter(source_id__isnull=False).values('source_id', 'exercise_id', *CATALOGUE_FIELDS)
+        }
+        # Rows created before source ids existed are adopted by name so their UUIDs survive,
+        # one legacy row per incoming entry.
+        legacy = defaultdict(list)
+        legacy_rows = Exercise.objects.filter(source_id__isnull=True).order_by('exercise_id')
+        for row in legacy_rows.values('exercise_id', 'name', 'level', *LEGACY_MATCH_FIELDS):
+            legacy[row.pop('name')].append(row)
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        relevelled, changed = [], []
+
+        while batch := list(islice(entries, batch_size)):
+            rows, adopted = [], []
+            for entry in batch:
+                source_id = str(entry['id'])
+                fields = catalogue_fields(entry)
+                current = existing.get(source_id)
+                if current is None and legacy.get(fields['name']):
+                    legacy_row = adopt_legacy(legacy[fields['name']], fields)
+                    adopted.append(Exercise(exercise_id=legacy_row['exercise_id'], source_id=source_id))
+                    changed.append(legacy_row['exercise_id'])
+                    if legacy_row['level'] != fields['level']:
+                        relevelled.append(legacy_row['exercise_id'])
+                    stats['updated'] += 1
+                elif current is None:
+                    stats['inserted'] += 1
+                elif all(current[field] == value for field, value in fields.items()):
+                    stats['unchanged'] += 1
+                    continue
+                else:
+                    stats['updated'] += 1
+                    changed.append(current['exercise_id'])
+                    if current['level'] != fields['level']:
+                        relevelled.append(current['exercise_id'])
+                rows.append(Exercise(source_id=source_id, change_version=next_change_version(), **fields))
+
+            Exercise.objects.bulk_update(adopted, ['source_id'])
+            Exercise.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['source_id'],
+                update_fields=CATALOGUE_FIELDS + ['updated_at', 'change_version'],
+            )
+
+        # bulk_create skips Exercise.save(), so recount the programs whose exercises changed level.
+        if relevelled:
+            for program_model in (WorkoutProgram, UserCustomWorkoutProgram):
+                program_model.refresh_levels(program_model.objects.filter(schedule__in=relevelled).values('pk'))
+        # ... and the post_save handler that moves the programs embedding them into the change feed.
+        if changed:
+            WorkoutProgram.objects.filter(schedule__in=changed).update(**WorkoutProgram.change_stamp())
+        return stats
@@ -0,0 +1,24 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from fitcom_app.models import Tombstone, tombstone_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete change-feed tombstones older than --days (TOMBSTONE_RETENTION_DAYS by default). Clients '
+        'whose ?since= predates the newest pruned tombstone are sent a full reset instead of a delta. '
+        'Run it periodically, e.g. daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TOMBSTONE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days cannot be negative.')
+        deleted = Tombstone.prune(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {deleted} tombstones; clients older than version {tombstone_horizon()} resync.'
+        ))
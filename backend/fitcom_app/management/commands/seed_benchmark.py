@@ -0,0 +1,134 @@
+import random
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import DailyUserProgress, ProgressRollup, User
+from fitcom_app.benchmark import require_local_database
+from fitcom_app.models import Comment, Exercise, Post, WorkoutProgram
+
+BENCHMARK_EMAIL_DOMAIN = 'benchmark.fitcom.invalid'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def benchmark_users():
+    return User.objects.filter(email__endswith='@' + BENCHMARK_EMAIL_DOMAIN)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a local database at production-like scale for benchmark_api. Benchmark users are '
+        f'<n>@{BENCHMARK_EMAIL_DOMAIN} with password "{BENCHMARK_PASSWORD}". Never run against a shared database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments-per-post', type=int, default=3, help='Average; the actual count varies per post.')
+        parser.add_argument('--progress-users', type=int, default=2000, help='Users that get daily-progress history.')
+        parser.add_argument('--progress-days', type=int, default=90)
+        parser.add_argument('--programs', type=int, default=50, help='Admin workout programs to generate if there are none.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded benchmark users and their data first.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--allow-remote', action='store_true', help='Run even if the database is not local.')
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['posts'], options['progress_users'], options['progress_days']) < 0:
+            raise CommandError('Counts cannot be negative.')
+        if options['progress_users'] > options['users']:
+            raise CommandError('--progress-users cannot exceed --users.')
+        require_local_database(options['allow_remote'])
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        if options['clear']:
+            deleted, _ = benchmark_users().delete()
+            self.stdout.write(f'Deleted {deleted} benchmark rows.')
+        elif benchmark_users().exists():
+            raise CommandError('Benchmark data already exists; pass --clear to reseed.')
+
+        if not Exercise.objects.exists():
+            call_command('import_exercises', stdout=self.stdout)
+        if not WorkoutProgram.objects.exists() and options['programs']:
+            call_command('generate_programs', count=options['programs'], seed=options['seed'], stdout=self.stdout)
+
+        with transaction.atomic():
+            user_ids = self.seed_users(rng, options['users'], batch_size)
+            self.seed_posts(rng, user_ids, options['posts'], options['comments_per_post'], batch_size)
+            self.seed_progress(rng, user_ids[:options['progress_users']], options['progress_days'], batch_size)
+        ProgressRollup.rebuild(benchmark_users().values('pk'), batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['users']} users, {options['posts']} posts and "
+            f"{options['progress_users'] * options['progress_days']} daily-progress rows."
+        ))
+
+    def seed_users(self, rng, count, batch_size):
+        # Hashing is the slow part of creating users, and every benchmark user
+        # shares the same password, so hash it once.
+        password = make_password(BENCHMARK_PASSWORD)
+        users = []
+        for n in range(count):
+            user = User(
+                email=f'{n}@{BENCHMARK_EMAIL_DOMAIN}',
+                username=f'bench{n}',
+                password=password,
+                weight=rng.uniform(50, 110),
+                height=rng.uniform(150, 200),
+                age=rng.randint(18, 70),
+                gender=rng.choice(['male', 'female']),
+                userLevel=rng.choice(User.ACTIVITY_LEVEL_CHOICES)[0],
+            )
+            user.calculate_needs(commit=False)
+            users.append(user)
+        User.objects.bulk_create(users, batch_size=batch_size)
+        return list(benchmark_users().order_by('pk').values_list('pk', flat=True))
+
+    def seed_posts(self, rng, user_ids, count, comments_per_post, batch_size):
+        if not user_ids:
+            return
+        now = timezone.now()
+        posts, comments = [], []
+        for n in range(count):
+            post = Post(
+                author_id=rng.choice(user_ids),
+                title=f'Benchmark post {n}',
+                content='Progress update. ' * rng.randint(1, 20),
+                timestamp=now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                likes=rng.randint(0, 200),
+            )
+            posts.append(post)
+            for _ in range(rng.randint(0, 2 * comments_per_post)):
+                comments.append(Comment(
+                    post=post,
+                    author_id=rng.choice(user_ids),
+                    content='Nice work!',
+                    timestamp=post.timestamp + timedelta(minutes=rng.randint(1, 600)),
+                ))
+        Post.objects.bulk_create(posts, batch_size=batch_size)
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+    def seed_progress(self, rng, user_ids, days, batch_size):
+        today = timezone.localdate()
+        rows = []
+        for user_id in user_ids:
+            for offset in range(days):
+                rows.append(DailyUserProgress(
+                    user_id=user_id,
+                    date=today - timedelta(days=offset),
+                    workout_completed=rng.random() < 0.5,
+                    kcal_burned=round(rng.uniform(0, 800), 1),
+                    kcal_consumed=round(rng.uniform(1200, 3500), 1),
+                    protein_consumed=round(rng.uniform(40, 200), 1),
+                    carbs_consumed=round(rng.uniform(100, 400), 1),
+                    fat_consumed=round(rng.uniform(30, 120), 1),
+                    water_consumed=round(rng.uniform(0.5, 4), 1),
+                ))
+            if len(rows) >= batch_size:
+                DailyUserProgress.objects.bulk_create(rows, batch_size=batch_size)
+                rows = []
+        DailyUserProgress.objects.bulk_create(rows, batch_size=batch_size)
@@ -0,0 +1,222 @@
+"""
+Per-endpoint request metrics, collected by RequestMetricsMiddleware.
+
+For every request the middleware resolves to a view, it records:
+- the number of SQL queries and the time spent in them,
+- serialization time (serializer to_representation plus rendering),
+- the response size,
+- duplicate queries, meaning the same SQL run more than once (the usual N+1 signature).
+
+Each worker process aggregates these per endpoint (e.g. ``PostViewSet.list``)
+into fixed-bucket histograms. Recording is a couple of perf_counter() calls and
+a dict update per query, cheap enough to leave on in production.
+"""
+import bisect
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.utils import timezone
+
+current_profile = ContextVar('request_profile', default=None)
+
+DURATION_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+QUERY_BUCKETS = [0, 1, 2, 3, 5, 10, 20, 50, 100]
+SIZE_BUCKETS_BYTES = [1_000, 10_000, 100_000, 1_000_000]
+MAX_TRACKED_DUPLICATES = 50
+MAX_SQL_LENGTH = 300
+
+
+class RequestProfile:
+    """What one request spent its time on; shared by the threads serving it."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.statements = Counter()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        self.statements[sql] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.statements.items() if count > 1}
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """A connection.execute_wrapper that times queries while a request is profiled."""
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver; pooled connections are created more than once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Adds the enclosed time to the request's serialization time. Nested
+    serializers are already covered by the outermost one, and queries they
+    trigger lazily count as SQL time, not serialization.
+    """
+    profile = current_profile.get()
+    if profile is None or profile.serializing:
+        yield
+        return
+    profile.serializing = True
+    start, sql_start = time.perf_counter(), profile.sql_time
+    try:
+        yield
+    finally:
+        profile.serializing = False
+        profile.serialize_time += time.perf_counter() - start - (profile.sql_time - sql_start)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        # The last bucket has no upper bound.
+        return {
+            'count': self.total,
+            'mean': round(self.sum / self.total, 2) if self.total else None,
+            'max': round(self.max, 2),
+            'buckets': [{'le': bound, 'count': count} for bound, count in zip(self.bounds + [None], self.counts)],
+        }
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.server_errors = 0
+        self.requests_with_duplicates = 0
+        self.duplicate_queries = 0
+        self.duplicate_statements = Counter()
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.sql_ms = Histogram(DURATION_BUCKETS_MS)
+        self.serialize_ms = Histogram(DURATION_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS_BYTES)
+
+    def add(self, profile, duration, status_code, size):
+        self.requests += 1
+        self.server_errors += status_code >= 500
+        self.duration_ms.add(duration * 1000)
+        self.sql_ms.add(profile.sql_time * 1000)
+        self.serialize_ms.add(profile.serialize_time * 1000)
+        self.queries.add(profile.queries)
+        if size is not None:
+            self.response_bytes.add(size)
+
+        duplicates = profile.duplicates()
+        if duplicates:
+            self.requests_with_duplicates += 1
+            for sql, count in duplicates.items():
+                self.duplicate_queries += count - 1
+                sql = sql[:MAX_SQL_LENGTH]
+                if sql in self.duplicate_statements or len(self.duplicate_statements) < MAX_TRACKED_DUPLICATES:
+                    self.duplicate_statements[sql] += count - 1
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'server_errors': self.server_errors,
+            'requests_with_duplicates': self.requests_with_duplicates,
+            'duplicate_queries': self.duplicate_queries,
+            'top_duplicates': [
+                {'sql': sql, 'repeats': count} for sql, count in self.duplicate_statements.most_common(5)
+            ],
+            'duration_ms': self.duration_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'serialize_ms': self.serialize_ms.as_dict(),
+            'response_bytes': self.response_bytes.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.since = timezone.now()
+
+    def record(self, endpoint, profile, duration, status_code, size):
+        with self.lock:
+            metrics = self.endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self.endpoints[endpoint] = EndpointMetrics()
+            metrics.add(profile, duration, status_code, size)
+
+    def snapshot(self):
+        with self.lock:
+            # Most expensive endpoints first.
+            ordered = sorted(self.endpoints.items(), key=lambda item: item[1].duration_ms.sum, reverse=True)
+            return {
+                'pid': os.getpid(),
+                'since': self.since,
+                'endpoints': {endpoint: metrics.as_dict() for endpoint, metrics in ordered},
+            }
+
+
+registry = MetricsRegistry()
+
+
+def endpoint_name(request):
+    """``PostViewSet.list`` for viewsets, the view class or function name otherwise."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if cls is None:
+        return getattr(func, '__qualname__', repr(func))
+    actions = getattr(func, 'actions', None)
+    if actions:
+        return f'{cls.__name__}.{actions.get(request.method.lower(), request.method.lower())}'
+    return cls.__name__
+
+
+def server_timing(profile, duration):
+    db = profile.sql_time * 1000
+    serialize = profile.serialize_time * 1000
+    total = duration * 1000
+    duplicates = sum(count - 1 for count in profile.duplicates().values())
+    return ', '.join([
+        f'db;dur={db:.2f};desc="{profile.queries} queries, {duplicates} duplicate"',
+        f'serialize;dur={serialize:.2f}',
+        f'app;dur={max(total - db - serialize, 0):.2f}',
+        f'total;dur={total:.2f}',
+    ])
@@ -0,0 +1,99 @@
+import re
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from . import metrics
+from .compression import compress, is_compressible, negotiate_encoding
+
+
+class RequestMetricsMiddleware:
+    """
+    Profiles each request (see fitcom_app.metrics), aggregates the result per
+    endpoint and reports it in a Server-Timing header. Keep it first in
+    MIDDLEWARE so the total includes the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile = metrics.RequestProfile()
+        token = metrics.current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = metrics.RequestProfile()
+        token = metrics.current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; time the rendering too.
+        profile = metrics.current_profile.get()
+        if profile is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                profile.serialize_time += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, profile):
+        duration = profile.elapsed()
+        endpoint = metrics.endpoint_name(request)
+        if endpoint is not None:
+            size = None if response.streaming else len(response.content)
+            metrics.registry.record(endpoint, profile, duration, response.status_code, size)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = metrics.server_timing(profile, duration)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses text and JSON responses of at least COMPRESSION_MIN_SIZE bytes,
+    with brotli when it is installed and accepted, gzip otherwise. Responses
+    that already carry a Content-Encoding, like the precompressed catalogue
+    bundle, pass through untouched.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response.get('Content-Type', '')):
+            return response
+        if response.streaming:
+            return super().process_response(request, response)
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate_encoding(request)
+        if coding != 'br':
+            # GZipMiddleware also pads gzip output against BREACH.
+            return super().process_response(request, response) if coding == 'gzip' else response
+
+        compressed = compress(response.content, 'br', settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        if response.has_header('ETag'):
+            response.headers['ETag'] = re.sub(r'^"', 'W/"', response.headers['ETag'])
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:21
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_level_counts(apps, schema_editor):
+    for model_name in ('WorkoutProgram', 'UserCustomWorkoutProgram'):
+        program_model = apps.get_model('fitcom_app', model_name)
+        through = program_model.schedule.through
+        program_field = program_model.schedule.field.m2m_field_name()
+
+        def count(level):
+            rows = through.objects.filter(**{program_field: OuterRef('pk'), 'exercise__level': level})
+            return Coalesce(Subquery(rows.values(program_field).annotate(n=Count('pk')).values('n')), 0)
+
+        program_model.objects.update(
+            beginner_count=count('Beginner'),
+            intermediate_count=count('Intermediate'),
+            expert_count=count('Expert'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitcom_app', '0003_postlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercustomworkoutprogram',
+            name='beginner_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='usercustomworkoutprogram',
+            name='expert_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='usercustomworkoutprogram',
+            name='intermediate_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workoutprogram',
+            name='beginner_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workoutprogram',
+            name='expert_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workoutprogram',
+            name='intermediate_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_level_counts, migrations.RunPython.noop),
+    ]
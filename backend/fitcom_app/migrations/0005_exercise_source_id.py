@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitcom_app', '0004_workout_program_level_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='source_id',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, unique=True),
+        ),
+    ]
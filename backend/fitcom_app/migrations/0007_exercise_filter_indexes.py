@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:26
+
+from django.db import migrations, models
+
+
+# Trigram GIN index for ?search= (name__icontains compiles to UPPER(name::text) LIKE ...).
+# Postgres only; other backends fall back to a scan of the filtered rows.
+def create_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS exercise_name_trgm_idx '
+        'ON fitcom_app_exercise USING gin (UPPER(name::text) gin_trgm_ops)'
+    )
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS exercise_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitcom_app', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['name', 'exercise_id'], name='exercise_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['body_part', 'equipment', 'level'], name='exercise_body_part_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['target', 'level'], name='exercise_target_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['equipment', 'level'], name='exercise_equipment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['level'], name='exercise_level_idx'),
+        ),
+        migrations.RunPython(create_name_trigram_index, drop_name_trigram_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_links_to_comments(apps, schema_editor):
+    Comment = apps.get_model('fitcom_app', 'Comment')
+    through = apps.get_model('fitcom_app', 'Post').comments.through
+    # The API only ever linked a comment to one post.
+    links = through.objects.filter(comment_id=OuterRef('pk')).order_by('pk').values('post_id')[:1]
+    Comment.objects.update(post=Subquery(links))
+
+
+def copy_comments_to_links(apps, schema_editor):
+    Comment = apps.get_model('fitcom_app', 'Comment')
+    through = apps.get_model('fitcom_app', 'Post').comments.through
+    through.objects.bulk_create(
+        through(post_id=post_id, comment_id=comment_id)
+        for comment_id, post_id in Comment.objects.filter(post__isnull=False).values_list('pk', 'post_id')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitcom_app', '0007_exercise_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='fitcom_app.post'),
+        ),
+        migrations.RunPython(copy_links_to_comments, copy_comments_to_links),
+        migrations.RemoveField(
+            model_name='post',
+            name='comments',
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='fitcom_app.post'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'timestamp'], name='comment_post_timestamp_idx'),
+        ),
+    ]
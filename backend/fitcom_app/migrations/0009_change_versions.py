@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:58
+
+from django.db import migrations, models
+
+
+def stamp_existing_rows(apps, schema_editor):
+    # Existing rows become version 1, so a client syncing from 0 gets all of them.
+    apps.get_model('fitcom_app', 'ChangeCounter').objects.create(name='catalogue', value=1)
+    apps.get_model('fitcom_app', 'Exercise').objects.update(change_version=1)
+    apps.get_model('fitcom_app', 'WorkoutProgram').objects.update(change_version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitcom_app', '0008_comment_post'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='change_version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workoutprogram',
+            name='change_version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(stamp_existing_rows, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.UUIDField()),
+                ('change_version', models.BigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'change_version'], name='tombstone_model_version_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitcom_app', '0009_change_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='deleted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,136 @@
+import hashlib
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .models import Tombstone, current_change_version, tombstone_horizon
+
+
+def get_validators(request, media_type, last_modified, count, extra=''):
+    """The (ETag, Last-Modified timestamp) pair for a representation of `count` rows."""
+    validator = '|'.join([
+        request.get_full_path(),
+        media_type,
+        str(count),
+        last_modified.isoformat() if last_modified else '',
+        extra,
+    ])
+    etag = '"%s"' % hashlib.md5(validator.encode()).hexdigest()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp
+
+
+def set_validator_headers(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+class ConditionalGetMixin:
+    """
+    Answer list/retrieve with 304 Not Modified when the client's ETag (or,
+    for a plain detail, Last-Modified) still matches. The validators come from
+    a MAX/COUNT aggregate over `last_modified_field`, so an unchanged resource
+    is never serialized.
+
+    Lists and representations with validator extras send an ETag only: the
+    newest timestamp has one-second resolution and moves neither on deletes
+    nor on changes to nested rows, so If-Modified-Since could answer 304 for a
+    list that did change.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_validator_extra(self):
+        """Extra state the representation depends on, e.g. nested resources."""
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        stamp = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last_modified=Max(self.last_modified_field),
+            count=Count('pk'),
+        )
+        return self.conditional_response(stamp['last_modified'], stamp['count'], super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last_modified = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .order_by()
+                .values_list(self.last_modified_field, flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            # A malformed id, e.g. not a UUID: 404 like get_object() would.
+            raise Http404
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(last_modified, 1, super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, last_modified, count, handler, request, *args, **kwargs):
+        extra = self.get_validator_extra()
+        etag, timestamp = get_validators(request, request.accepted_media_type, last_modified, count, extra)
+        if self.action == 'list' or extra:
+            timestamp = None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = self.build_response(handler, etag, request, *args, **kwargs)
+        set_validator_headers(response, etag, timestamp)
+        return response
+
+    def build_response(self, handler, etag, request, *args, **kwargs):
+        return handler(request, *args, **kwargs)
+
+
+class CompactListMixin:
+    """List actions serialize `Meta.compact_fields` only; retrieve keeps the full detail."""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['compact'] = self.action == 'list'
+        return context
+
+
+class ChangeFeedMixin:
+    """
+    GET .../changes/?since=<version> on a ChangeTrackedModel viewset: the rows
+    written and the ids deleted after that change version, and the `version`
+    to pass next time. With since=0, a version this database never issued
+    (e.g. after a restore) or one older than the tombstone horizon (deletes
+    since then may have been pruned, see prune_tombstones), `reset` is true
+    and `changed` holds every row; the client then replaces its copy instead
+    of merging.
+    """
+
+    @action(detail=False, methods=['get'], pagination_class=None, filter_backends=[])
+    def changes(self, request):
+        since = request.query_params.get('since', '0')
+        if not since.isdigit():
+            raise ValidationError({'since': 'Expected a change version (a non-negative integer).'})
+        since = int(since)
+
+        # The counter is read before the rows and tombstones and is the next
+        # `since`: anything committed after it is sent again next time rather
+        # than skipped.
+        version = current_change_version()
+        reset = since == 0 or since > version or since < tombstone_horizon()
+        if reset:
+            since = 0
+        rows = self.get_queryset().filter(change_version__gt=since).order_by('change_version', 'pk')
+        deleted = [] if reset else (
+            Tombstone.objects.filter(model=self.queryset.model._meta.label_lower, change_version__gt=since)
+            .order_by('change_version')
+            .values_list('object_id', flat=True)
+        )
+        return Response({
+            'version': version,
+            'reset': reset,
+            'changed': self.get_serializer(rows, many=True).data,
+            'deleted': list(deleted),
+        })
@@ -1,6 +1,9 @@
 import uuid
-from django.db import models
-from statistics import mean
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.forms import ValidationError
 from django.utils import timezone
 from django.conf import settings
@@ -11,8 +14,128 @@ class Level(models.TextChoices):
     INTERMEDIATE = 'Intermediate', ('Intermediate')
     EXPERT = 'Expert', ('Expert')
 
-class Exercise(models.Model):
+class ChangeCounter(models.Model):
+    """Named counters; 'catalogue' numbers the changes the ?since= feeds report."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+CATALOGUE_COUNTER = 'catalogue'
+# The newest change version whose tombstones have been pruned.
+TOMBSTONE_HORIZON_COUNTER = 'tombstone_horizon'
+
+
+# The version shared by the writes of the innermost change_batch().
+_batch_version = ContextVar('change_batch_version', default=None)
+
+
+def _increment_counter():
+    counter = ChangeCounter.objects.filter(name=CATALOGUE_COUNTER)
+    if not counter.update(value=F('value') + 1):
+        ChangeCounter.objects.get_or_create(name=CATALOGUE_COUNTER)
+        counter.update(value=F('value') + 1)
+    return counter.values_list('value', flat=True).get()
+
+
+def next_change_version():
+    """
+    The catalogue change version for rows about to be written; call it inside
+    the transaction that writes them. Incrementing the counter locks its row
+    until commit, so versions become visible in order and a client that has
+    seen version N has seen every change up to N. Inside change_batch() every
+    write shares the batch's version.
+    """
+    version = _batch_version.get()
+    return version if version is not None else _increment_counter()
+
+
+@contextmanager
+def change_batch():
+    """A transaction whose catalogue writes all take one change version, for bulk imports and deletes."""
+    with transaction.atomic():
+        token = _batch_version.set(_increment_counter())
+        try:
+            yield _batch_version.get()
+        finally:
+            _batch_version.reset(token)
+
+
+def current_change_version():
+    return ChangeCounter.objects.filter(name=CATALOGUE_COUNTER).values_list('value', flat=True).first() or 0
+
+
+def tombstone_horizon():
+    """Clients last synced before this version may have missed pruned deletes and must reset."""
+    return ChangeCounter.objects.filter(name=TOMBSTONE_HORIZON_COUNTER).values_list('value', flat=True).first() or 0
+
+
+class ChangeTrackedModel(models.Model):
+    """
+    Rows stamped with next_change_version() on every save, for the ?since=
+    change feeds (see ChangeFeedMixin); deleting one leaves a Tombstone.
+    QuerySet.update() and bulk writes must set change_version themselves.
+    """
+    change_version = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            self.change_version = next_change_version()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change_version'}
+            super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    """
+    A deleted ChangeTrackedModel row, reported by the change feed of its
+    model until prune() drops it.
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    change_version = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'change_version'], name='tombstone_model_version_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id} deleted at {self.change_version}'
+
+    @classmethod
+    def record(cls, instance):
+        return cls.objects.create(
+            model=instance._meta.label_lower, object_id=instance.pk, change_version=next_change_version()
+        )
+
+    @classmethod
+    def prune(cls, before):
+        """
+        Deletes the tombstones recorded before `before` and raises the
+        tombstone horizon to their newest version. Returns how many went.
+        """
+        with transaction.atomic():
+            horizon = cls.objects.filter(deleted_at__lt=before).aggregate(horizon=Max('change_version'))['horizon']
+            if horizon is None:
+                return 0
+            deleted, _ = cls.objects.filter(change_version__lte=horizon).delete()
+            counter, _ = ChangeCounter.objects.select_for_update().get_or_create(name=TOMBSTONE_HORIZON_COUNTER)
+            if horizon > counter.value:
+                counter.value = horizon
+                counter.save(update_fields=['value'])
+        return deleted
+
+
+class Exercise(ChangeTrackedModel):
     exercise_id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
+    source_id = models.CharField(max_length=20, unique=True, null=True, blank=True, editable=False)
     name = models.CharField(max_length=200)
     body_part = models.CharField(max_length=100)
     equipment = models.CharField(max_length=100)
@@ -21,10 +144,34 @@ class Exercise(models.Model):
     secondary_muscles = models.JSONField(default=list)
     instructions = models.JSONField(default=list)
     level = models.CharField(max_length=20, choices=Level.choices, default=Level.BEGINNER)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'exercise_id'], name='exercise_name_idx'),
+            models.Index(fields=['body_part', 'equipment', 'level'], name='exercise_body_part_idx'),
+            models.Index(fields=['target', 'level'], name='exercise_target_idx'),
+            models.Index(fields=['equipment', 'level'], name='exercise_equipment_idx'),
+            models.Index(fields=['level'], name='exercise_level_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_level = instance.__dict__.get('level')
+        return instance
+
+    def save(self, *args, **kwargs):
+        level_changed = not self._state.adding and getattr(self, '_loaded_level', self.level) != self.level
+        super().save(*args, **kwargs)
+        self._loaded_level = self.level
+        if level_changed:
+            for program_model in (WorkoutProgram, UserCustomWorkoutProgram):
+                program_model.refresh_levels(program_model.objects.filter(schedule=self).values('pk'))
+
     def clean(self):
         if self.level not in Level.values:
             raise ValidationError("Invalid level")
@@ -35,37 +182,94 @@ class AbstractWorkoutProgram(models.Model):
     description = models.TextField(default="")
     schedule = models.ManyToManyField(Exercise)
     level = models.CharField(max_length=20, choices=Level.choices, editable=False)
+    beginner_count = models.PositiveIntegerField(default=0, editable=False)
+    intermediate_count = models.PositiveIntegerField(default=0, editable=False)
+    expert_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
 
-    def save(self, *args, **kwargs):
-        if not self.pk:
-            super().save(*args, **kwargs)
-        self.update_level()
-        super().save(*args, **kwargs)
-
     def update_level(self):
-        exercises = self.schedule.all()
-        levels = [exercise.level for exercise in exercises]
-        if levels:
-            level_map = {'Beginner': 0, 'Intermediate': 1, 'Expert': 2}
-            numerical_levels = [level_map[lev] for lev in levels]
-            avg_level = mean(numerical_levels)
-            if avg_level <= 0.5:
-                self.level = Level.BEGINNER
-            elif avg_level <= 1.5:
-                self.level = Level.INTERMEDIATE
-            else:
-                self.level = Level.EXPERT
-
-class WorkoutProgram(AbstractWorkoutProgram):
+        counts = self.schedule.aggregate(
+            beginner_count=Count('pk', filter=Q(level=Level.BEGINNER)),
+            intermediate_count=Count('pk', filter=Q(level=Level.INTERMEDIATE)),
+            expert_count=Count('pk', filter=Q(level=Level.EXPERT)),
+        )
+        for field, value in counts.items():
+            setattr(self, field, value)
+        self.level = level_from_counts(**counts) or self.level
+        with transaction.atomic(savepoint=False):
+            type(self).objects.filter(pk=self.pk).update(level=self.level, **self.change_stamp(), **counts)
+
+    @classmethod
+    def refresh_levels(cls, program_ids):
+        """Recount the schedule levels of many programs with two UPDATEs."""
+        through = cls.schedule.through
+        program_field = cls.schedule.field.m2m_field_name()
+
+        def count(level):
+            rows = through.objects.filter(**{program_field: OuterRef('pk'), 'exercise__level': level})
+            return Coalesce(Subquery(rows.values(program_field).annotate(n=Count('pk')).values('n')), 0)
+
+        programs = cls.objects.filter(pk__in=program_ids)
+        with transaction.atomic(savepoint=False):
+            programs.update(
+                beginner_count=count(Level.BEGINNER),
+                intermediate_count=count(Level.INTERMEDIATE),
+                expert_count=count(Level.EXPERT),
+            )
+            programs.update(level=level_expression(), **cls.change_stamp())
+
+    @classmethod
+    def change_stamp(cls):
+        """The fields an UPDATE that changes the programs' representation must set."""
+        return {'updated_at': timezone.now()}
+
+
+def level_from_counts(beginner_count, intermediate_count, expert_count):
+    """Average the schedule levels (Beginner=0, Intermediate=1, Expert=2)."""
+    total = beginner_count + intermediate_count + expert_count
+    if not total:
+        return None
+    avg_level = (intermediate_count + 2 * expert_count) / total
+    if avg_level <= 0.5:
+        return Level.BEGINNER
+    elif avg_level <= 1.5:
+        return Level.INTERMEDIATE
+    return Level.EXPERT
+
+
+def level_expression():
+    """SQL version of level_from_counts, with the average rearranged into integer comparisons."""
+    beginner, intermediate, expert = F('beginner_count'), F('intermediate_count'), F('expert_count')
+    return Case(
+        When(beginner_count=0, intermediate_count=0, expert_count=0, then=F('level')),
+        When(beginner_count__gte=intermediate + 3 * expert, then=Value(Level.BEGINNER)),
+        When(expert_count__lte=3 * beginner + intermediate, then=Value(Level.INTERMEDIATE)),
+        default=Value(Level.EXPERT),
+    )
+
+class WorkoutProgram(ChangeTrackedModel, AbstractWorkoutProgram):
     is_admin_created = models.BooleanField(default=True)
     def save(self, *args, **kwargs):
         if not self.pk:
             self.is_admin_created = True
         super().save(*args, **kwargs)
 
+    @classmethod
+    def change_stamp(cls):
+        return {**super().change_stamp(), 'change_version': next_change_version()}
+
+    def copy_for(self, user):
+        """A UserCustomWorkoutProgram for `user` with this program's name, description and schedule."""
+        with transaction.atomic():
+            custom_program = UserCustomWorkoutProgram.objects.create(
+                user=user, name=self.name, description=self.description
+            )
+            custom_program.schedule.set(self.schedule.all())
+        return custom_program
+
 class UserCustomWorkoutProgram(AbstractWorkoutProgram):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='custom_programs')
     def save(self, *args, **kwargs):
@@ -75,35 +279,95 @@ class UserCustomWorkoutProgram(AbstractWorkoutProgram):
 
 class Comment(models.Model):
     comment_id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='comments', null=True, blank=True)
     author = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='comments')
     content = models.TextField()
     timestamp = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'timestamp'], name='comment_post_timestamp_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on {self.timestamp}'
 
 
+class PostQuerySet(models.QuerySet):
+    def with_comment_preview(self, size=None):
+        """Annotates comment_count and prefetches the latest comments into latest_comments."""
+        size = Post.COMMENT_PREVIEW_SIZE if size is None else size
+        # A correlated count per row, not a JOIN + GROUP BY over the whole feed.
+        counts = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('pk'))
+        latest = Comment.objects.select_related('author').order_by('-timestamp', 'comment_id')[:size]
+        return self.annotate(comment_count=Coalesce(Subquery(counts.values('n')), 0)).prefetch_related(
+            models.Prefetch('comments', queryset=latest, to_attr='latest_comments')
+        )
+
+
 class Post(models.Model):
+    # Comments embedded in feed entries; full threads are paginated separately.
+    COMMENT_PREVIEW_SIZE = 3
+
     post_id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
     author = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='posts')
     title = models.CharField(max_length=255)
     content = models.TextField()
     timestamp = models.DateTimeField(default=timezone.now)
     likes = models.PositiveIntegerField(default=0)
-    comments = models.ManyToManyField(Comment, related_name='post_comments', blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
-    def like_post(self):
-        self.likes += 1
-        self.save()
+    def like_post(self, user=None):
+        with transaction.atomic():
+            if user is not None:
+                try:
+                    with transaction.atomic():
+                        PostLike.objects.create(post=self, user=user)
+                except IntegrityError:
+                    return False
+            Post.objects.filter(pk=self.pk).update(likes=F('likes') + 1, updated_at=timezone.now())
+        self.refresh_from_db(fields=['likes'])
+        return True
+
+    def unlike_post(self, user):
+        with transaction.atomic():
+            deleted, _ = PostLike.objects.filter(post=self, user=user).delete()
+            if deleted:
+                Post.objects.filter(pk=self.pk, likes__gt=0).update(likes=F('likes') - 1, updated_at=timezone.now())
+        self.refresh_from_db(fields=['likes'])
+        return bool(deleted)
 
     def add_comment(self, comment):
-        self.comments.add(comment)
-        self.save()
+        comment.post = self
+        comment.save(update_fields=['post'])
+        self.touch()
 
     def delete_comment(self, comment):
-        self.comments.remove(comment)
-        self.save()
+        Comment.objects.filter(pk=comment.pk, post=self).update(post=None)
+        comment.post = None
+        self.touch()
 
+    def touch(self):
+        """Bumps updated_at, which feeds the list ETag, without rewriting other fields."""
+        self.updated_at = timezone.now()
+        Post.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
+
+
+
+class PostLike(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='like_records')
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='post_likes')
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'user'], name='unique_post_like'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} likes {self.post}'
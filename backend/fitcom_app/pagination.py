@@ -0,0 +1,150 @@
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on every ordering field instead of using
+    DRF's position + offset scheme, so deep pages cost the same as the first.
+
+    The last ordering field must be unique (usually the primary key) so that
+    every row has a distinct position and no offsets are ever needed.
+    """
+    ordering = ('pk',)
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, fetching the page with the async ORM."""
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        self.position = self.cursor.position if self.cursor else None
+        self.reverse = bool(self.cursor and self.cursor.reverse)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.position, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, position, reverse):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y), with the
+        # comparison flipped for descending fields and reversed cursors.
+        keyset = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            value = self.to_python(name, value)
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            keyset |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return keyset
+
+    def to_python(self, name, value):
+        """A position value converted for the field, so a tampered cursor is a 404 rather than a database error."""
+        # Positions are encoded as strings; see _get_position_from_instance.
+        if not isinstance(value, str):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            model_field = self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+            return model_field.to_python(value)
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values, separators=(',', ':'))
+
+
+class ExercisePagination(KeysetCursorPagination):
+    ordering = ('name', 'exercise_id')
+
+
+class WorkoutProgramPagination(KeysetCursorPagination):
+    ordering = ('name', 'program_id')
+
+
+class PostPagination(KeysetCursorPagination):
+    ordering = ('-timestamp', 'post_id')
+
+
+class CommentPagination(KeysetCursorPagination):
+    ordering = ('-timestamp', 'comment_id')
+
+
+class DailyUserProgressPagination(KeysetCursorPagination):
+    ordering = ('-date', 'id')
+
+
+class UserPagination(KeysetCursorPagination):
+    ordering = ('id',)
@@ -1,14 +1,62 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from .metrics import timed_serialization
 from .models import Exercise, WorkoutProgram,UserCustomWorkoutProgram,Post,Comment
 
-class ExerciseSerializer(serializers.ModelSerializer):
+
+def query_param_set(request, name):
+    return {part.strip() for part in request.query_params.get(name, '').split(',') if part.strip()}
+
+
+class FlexFieldsMixin:
+    """
+    Trims the representation per request:
+
+    * ``?fields=a,b`` keeps only those top-level fields.
+    * List views put ``compact`` in the context, and every serializer that
+      declares ``Meta.compact_fields`` is cut down to them, at any nesting
+      level, unless the nested field is named in ``?expand=``.
+
+    It also times serialization for the request metrics.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        nested_name = self.get_nested_name()
+        if nested_name is None:
+            requested = query_param_set(request, 'fields')
+            if requested:
+                return {name: field for name, field in fields.items() if name in requested}
+        elif nested_name in query_param_set(request, 'expand'):
+            return fields
+
+        compact_fields = getattr(self.Meta, 'compact_fields', None)
+        if self.context.get('compact') and compact_fields:
+            return {name: field for name, field in fields.items() if name in compact_fields}
+        return fields
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+    def get_nested_name(self):
+        node = self.parent if isinstance(self.parent, serializers.ListSerializer) else self
+        return node.field_name if node.parent is not None else None
+
+
+class ExerciseSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Exercise
         fields = '__all__'
+        compact_fields = ['exercise_id', 'name', 'body_part', 'target', 'equipment', 'level', 'gif_url']
         ref_name = "WorkoutProgramExercise"
 
 
-class UserCustomWorkoutProgramSerializer(serializers.ModelSerializer):
+class UserCustomWorkoutProgramSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     schedule = ExerciseSerializer(many=True, read_only=True)
     schedule_ids = serializers.PrimaryKeyRelatedField(queryset=Exercise.objects.all(), many=True, write_only=True)
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -23,7 +71,6 @@ class UserCustomWorkoutProgramSerializer(serializers.ModelSerializer):
         schedule_ids = validated_data.pop('schedule_ids')
         custom_program = UserCustomWorkoutProgram.objects.create(**validated_data)
         custom_program.schedule.set(schedule_ids)
-        custom_program.update_level()
         return custom_program
 
     def update(self, instance, validated_data):
@@ -33,11 +80,10 @@ class UserCustomWorkoutProgramSerializer(serializers.ModelSerializer):
         instance.save()
         if schedule_ids:
             instance.schedule.set(schedule_ids)
-        instance.update_level()
         return instance
 
 
-class WorkoutProgramSerializer(serializers.ModelSerializer):
+class WorkoutProgramSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     schedule = ExerciseSerializer(many=True, read_only=True)
     schedule_ids = serializers.PrimaryKeyRelatedField(queryset=Exercise.objects.all(), many=True, write_only=True)
 
@@ -50,8 +96,6 @@ class WorkoutProgramSerializer(serializers.ModelSerializer):
         schedule_ids = validated_data.pop('schedule_ids')
         workout_program = WorkoutProgram.objects.create(**validated_data)
         workout_program.schedule.set(schedule_ids)
-
-        workout_program.save()
         return workout_program
 
     def update(self, instance, validated_data):
@@ -62,20 +106,21 @@ class WorkoutProgramSerializer(serializers.ModelSerializer):
 
         if schedule_ids:
             instance.schedule.set(schedule_ids)
-
-        instance.update_level()
         return instance
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['comment_id', 'author', 'content', 'timestamp']
 
-class PostSerializer(serializers.ModelSerializer):
-    comments = CommentSerializer(many=True, read_only=True)
+class PostSerializer(FlexFieldsMixin, serializers.ModelSerializer):
+    comments = CommentSerializer(source='latest_comments', many=True, read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
     author = serializers.ReadOnlyField(source='author.username')
 
     class Meta:
         model = Post
-        fields = ['post_id', 'author', 'title', 'content', 'timestamp', 'likes', 'comments']
+        # `comments` holds the latest Post.COMMENT_PREVIEW_SIZE; the full thread is at posts/{id}/comments/.
+        fields = ['post_id', 'author', 'title', 'content', 'timestamp', 'likes', 'comment_count', 'comments']
+        read_only_fields = ['likes']
@@ -0,0 +1,55 @@
+from django.db.models.signals import m2m_changed, pre_delete, post_delete, post_save
+from django.dispatch import receiver
+from .cache import bump_catalogue_version
+from .models import Exercise, Tombstone, WorkoutProgram, UserCustomWorkoutProgram
+
+PROGRAM_MODELS = (WorkoutProgram, UserCustomWorkoutProgram)
+
+
+@receiver(m2m_changed, sender=WorkoutProgram.schedule.through)
+@receiver(m2m_changed, sender=UserCustomWorkoutProgram.schedule.through)
+def schedule_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._cleared_program_ids = list(model.objects.filter(schedule=instance).values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.update_level()
+        return
+    program_ids = pk_set if action != 'post_clear' else instance.__dict__.pop('_cleared_program_ids', [])
+    if program_ids:
+        model.refresh_levels(program_ids)
+
+
+@receiver(pre_delete, sender=Exercise)
+def remember_exercise_programs(sender, instance, **kwargs):
+    instance._program_ids = {
+        program_model: list(program_model.objects.filter(schedule=instance).values_list('pk', flat=True))
+        for program_model in PROGRAM_MODELS
+    }
+
+
+@receiver(post_save, sender=Exercise)
+def exercise_saved(sender, instance, created, **kwargs):
+    bump_catalogue_version()
+    if not created:
+        # Programs embed their exercises, so they change with them. Checking
+        # first spares most exercise saves a second change version.
+        programs = WorkoutProgram.objects.filter(schedule=instance)
+        if programs.exists():
+            programs.update(**WorkoutProgram.change_stamp())
+
+
+@receiver(post_delete, sender=Exercise)
+def exercise_deleted(sender, instance, **kwargs):
+    bump_catalogue_version()
+    for program_model, program_ids in getattr(instance, '_program_ids', {}).items():
+        if program_ids:
+            program_model.refresh_levels(program_ids)
+
+
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=WorkoutProgram)
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.record(instance)
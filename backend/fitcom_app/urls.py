@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ExerciseViewSet,WorkoutProgramViewSet,UserCustomWorkoutProgramViewSet,PostViewSet,CommentViewSet
+from .views import ExerciseViewSet,WorkoutProgramViewSet,UserCustomWorkoutProgramViewSet,PostViewSet,CommentViewSet,RequestMetricsView
+from . import async_views
 from accounts.views import DailyUserProgressViewSet, UserViewSet
 
 router = DefaultRouter()
@@ -12,5 +13,10 @@ router.register(r'comments', CommentViewSet)
 router.register(r'user-custom-workout-programs',UserCustomWorkoutProgramViewSet)
 router.register(r'daily-progress', DailyUserProgressViewSet)
 urlpatterns = [
+    path('async/exercises/', async_views.ExerciseListView.as_view(), name='async-exercise-list'),
+    path('async/workout-programs/', async_views.WorkoutProgramListView.as_view(), name='async-workoutprogram-list'),
+    path('async/posts/', async_views.PostListView.as_view(), name='async-post-list'),
+    path('async/users/me/', async_views.MeView.as_view(), name='async-user-me'),
+    path('metrics/', RequestMetricsView.as_view(), name='request-metrics'),
     path('', include(router.urls)),
 ]
@@ -1,61 +1,119 @@
-from rest_framework import viewsets, mixins
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils import timezone
+from rest_framework import viewsets, mixins, status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser,IsAuthenticatedOrReadOnly
 from .models import Exercise, UserCustomWorkoutProgram, WorkoutProgram,Post,Comment
 from .serializers import ExerciseSerializer, UserCustomWorkoutProgramSerializer, WorkoutProgramSerializer,PostSerializer,CommentSerializer
 from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import metrics
+from .cache import catalogue_cache_key, get_catalogue_bundle
+from .compression import negotiate_encoding
+from .filters import ExerciseFilter
+from .mixins import ChangeFeedMixin, CompactListMixin, ConditionalGetMixin, set_validator_headers
+from .pagination import ExercisePagination, WorkoutProgramPagination, PostPagination, CommentPagination
 
 
-class ExerciseViewSet(viewsets.ModelViewSet):
+class ExerciseViewSet(ChangeFeedMixin, ConditionalGetMixin, CompactListMixin, viewsets.ModelViewSet):
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
+    pagination_class = ExercisePagination
+    filter_backends = [ExerciseFilter]
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'bundle', 'changes']:
             self.permission_classes = [IsAuthenticated]
         else:
             self.permission_classes = [IsAdminUser]
         return super().get_permissions()
 
-class WorkoutProgramViewSet(viewsets.ModelViewSet):
-    queryset = WorkoutProgram.objects.all()
+    @action(detail=False, methods=['get'])
+    def bundle(self, request):
+        """
+        The whole catalogue in one unpaginated JSON array, served precompressed
+        (brotli or gzip, per Accept-Encoding) from a bundle built once per
+        state of the catalogue. X-Change-Version is the `since` to pass to
+        exercises/changes/ to keep it current.
+        """
+        bundle = get_catalogue_bundle()
+        coding = negotiate_encoding(request, [coding for coding in bundle['encodings'] if coding != 'identity'])
+        etag = '"%s-%s"' % (bundle['etag'], coding or 'identity')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(bundle['encodings'][coding or 'identity'], content_type='application/json')
+            if coding:
+                response['Content-Encoding'] = coding
+        if 'version' in bundle:
+            response['X-Change-Version'] = bundle['version']
+        patch_vary_headers(response, ('Accept-Encoding',))
+        set_validator_headers(response, etag, None)
+        return response
+
+    def build_response(self, handler, etag, request, *args, **kwargs):
+        # Only JSON is cached; the browsable API always renders fresh.
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        key = catalogue_cache_key(etag)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response = self.finalize_response(request, response, *args, **kwargs)
+            response.render()
+            cache.set(key, (response.content, response['Content-Type']), settings.CATALOGUE_CACHE_TIMEOUT)
+        return response
+
+class WorkoutProgramViewSet(ChangeFeedMixin, ConditionalGetMixin, CompactListMixin, viewsets.ModelViewSet):
+    """The admin-curated program catalogue; users copy programs into their own with save_to_profile."""
+    queryset = WorkoutProgram.objects.filter(is_admin_created=True).prefetch_related('schedule')
     serializer_class = WorkoutProgramSerializer
-
-    def get_queryset(self):
-        user = self.request.user
-        if user.is_authenticated:
-            return WorkoutProgram.objects.filter(user__in=[None, user])
-        else:
-            return WorkoutProgram.objects.filter(user=None)
+    pagination_class = WorkoutProgramPagination
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'changes']:
             self.permission_classes = [AllowAny]
-        elif self.action in ['create', 'update', 'partial_update', 'destroy']:
+        elif self.action == 'save_to_profile':
             self.permission_classes = [IsAuthenticated]
         else:
             self.permission_classes = [IsAdminUser]
         return super().get_permissions()
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def get_validator_extra(self):
+        # Programs embed their exercises, so catalogue edits must change the ETag too.
+        stamp = Exercise.objects.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return f"{stamp['count']}:{stamp['last_modified']}"
 
     @action(detail=True, methods=['post'])
     def save_to_profile(self, request, pk=None):
         workout_program = self.get_object()
-        request.user.saved_workout_programs.add(workout_program)
-        return Response({'status': 'workout program saved to profile'})
+        custom_program = workout_program.copy_for(request.user)
+        request.user.saved_workout_programs.add(custom_program)
+        return Response(
+            {'status': 'workout program saved to profile', 'program_id': custom_program.pk},
+            status=status.HTTP_201_CREATED,
+        )
 
 
 
-class UserCustomWorkoutProgramViewSet(viewsets.ModelViewSet):
+class UserCustomWorkoutProgramViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = UserCustomWorkoutProgram.objects.all()
     serializer_class = UserCustomWorkoutProgramSerializer
+    pagination_class = WorkoutProgramPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return UserCustomWorkoutProgram.objects.none()
-        return UserCustomWorkoutProgram.objects.filter(user=self.request.user)
+        return UserCustomWorkoutProgram.objects.filter(user=self.request.user).prefetch_related('schedule')
 
 
     def perform_create(self, serializer):
@@ -63,21 +121,69 @@ class UserCustomWorkoutProgramViewSet(viewsets.ModelViewSet):
 
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by('-timestamp')
+class PostViewSet(ConditionalGetMixin, CompactListMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.select_related('author').with_comment_preview().order_by('-timestamp')
     serializer_class = PostSerializer
+    pagination_class = PostPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        if self.action == 'like':
+            return Post.objects.only('post_id', 'likes')
+        if self.action == 'comments':
+            return Post.objects.only('post_id')
+        return super().get_queryset()
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        # What with_comment_preview() would have loaded for a new post.
+        post.comment_count, post.latest_comments = 0, []
+
+    @action(detail=True, methods=['get'], serializer_class=CommentSerializer, pagination_class=CommentPagination)
+    def comments(self, request, pk=None):
+        """The post's full comment thread, newest first."""
+        post = self.get_object()
+        page = self.paginate_queryset(Comment.objects.filter(post=post).select_related('author'))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post', 'delete'], permission_classes=[IsAuthenticated])
+    def like(self, request, pk=None):
+        post = self.get_object()
+        if request.method == 'DELETE':
+            changed = post.unlike_post(request.user)
+        else:
+            changed = post.like_post(request.user)
+        return Response({'likes': post.likes, 'liked': request.method != 'DELETE', 'changed': changed})
 
 class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all().order_by('-timestamp')
     serializer_class = CommentSerializer
+    pagination_class = CommentPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def perform_create(self, serializer):
         post_id = self.request.data.get('post_id')
         post = Post.objects.get(post_id=post_id)
-        serializer.save(author=self.request.user)
-        post.add_comment(serializer.instance)
+        serializer.save(author=self.request.user, post=post)
+        post.touch()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        Post.objects.filter(pk=serializer.instance.post_id).update(updated_at=timezone.now())
+
+    def perform_destroy(self, instance):
+        Post.objects.filter(pk=instance.post_id).update(updated_at=timezone.now())
+        super().perform_destroy(instance)
+
+
+class RequestMetricsView(APIView):
+    """Per-endpoint request metrics of the worker process that answers; DELETE resets them."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.registry.snapshot())
+
+    def delete(self, request):
+        metrics.registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
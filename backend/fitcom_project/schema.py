@@ -0,0 +1,128 @@
+"""
+The OpenAPI schema, generated once per code version instead of per request.
+
+drf-yasg introspects every view and serializer to build the schema, which
+takes far longer than any API request. The document only changes when the
+code does, so it is built once per process, or read from the file that
+`manage.py generate_schema` writes at build time, and served from memory
+with an ETag and a public Cache-Control. The version is CODE_VERSION (or the
+commit Heroku exposes) and otherwise a hash of the project sources, so a
+deploy with new code never serves the previous schema.
+"""
+import hashlib
+import threading
+from pathlib import Path
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+info = openapi.Info(
+   title="Snippets API",
+   default_version='v1',
+   description="Test description",
+   terms_of_service="https://www.google.com/policies/terms/",
+   contact=openapi.Contact(email="contact@snippets.local"),
+   license=openapi.License(name="BSD License"),
+)
+
+schema_view = get_schema_view(
+   info,
+   public=True,
+   permission_classes=(permissions.AllowAny,),
+)
+
+CODECS = {'.json': OpenAPICodecJson, '.yaml': OpenAPICodecYaml}
+SOURCE_PACKAGES = ('accounts', 'fitcom_app', 'fitcom_project')
+
+_lock = threading.Lock()
+_code_version = None
+_schemas = {}
+
+
+def code_version():
+    """CODE_VERSION when the deploy sets one, else a hash of the sources and the schema libraries."""
+    global _code_version
+    if _code_version is None:
+        if settings.CODE_VERSION:
+            _code_version = settings.CODE_VERSION
+        else:
+            digest = hashlib.sha1(f'{drf_yasg.__version__}|{rest_framework.__version__}'.encode())
+            base = Path(settings.BASE_DIR)
+            for package in SOURCE_PACKAGES:
+                for path in sorted((base / package).rglob('*.py')):
+                    digest.update(str(path.relative_to(base)).encode())
+                    digest.update(path.read_bytes())
+            _code_version = digest.hexdigest()
+    return _code_version
+
+
+def schema_path(format, version=None):
+    return Path(settings.SCHEMA_ROOT) / f'openapi-{(version or code_version())[:12]}{format}'
+
+
+def generate_schema(format):
+    """Introspect the API and encode the schema; the slow part this module caches."""
+    generator = schema_view.generator_class(info, version='')
+    schema = generator.get_schema(request=None, public=True)
+    return CODECS[format](validators=[]).encode(schema)
+
+
+def write_schema(format):
+    """Generate the schema into SCHEMA_ROOT, where get_schema finds it under this code version."""
+    path = schema_path(format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(generate_schema(format))
+    return path
+
+
+def get_schema(format):
+    """(content, etag) of the schema for the running code, from memory, the schema file or the generator."""
+    version = code_version()
+    key = (version, format)
+    if key not in _schemas:
+        with _lock:
+            if key not in _schemas:
+                path = schema_path(format, version)
+                content = path.read_bytes() if path.exists() else generate_schema(format)
+                _schemas[key] = (content, '"%s"' % hashlib.md5(content).hexdigest())
+    return _schemas[key]
+
+
+def clear_schema_cache():
+    global _code_version
+    _code_version = None
+    _schemas.clear()
+
+
+def schema_json(request, format):
+    """The cached schema at swagger.json / swagger.yaml."""
+    if format not in CODECS:
+        raise Http404
+    content, etag = get_schema(format)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=CODECS[format].media_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.SCHEMA_CACHE_TIMEOUT)
+    return response
+
+
+def schema_ui(renderer):
+    """
+    The Swagger UI or ReDoc page. The page itself is cheap, it loads the
+    schema from SPEC_URL (the cached schema_json); ?format=openapi, which the
+    drf-yasg view would generate on the spot, is answered from the cache too.
+    """
+    view = schema_view.with_ui(renderer, cache_timeout=0)
+
+    def ui(request, *args, **kwargs):
+        if request.GET.get('format') == 'openapi':
+            return schema_json(request, '.json')
+        return view(request, *args, **kwargs)
+    return ui
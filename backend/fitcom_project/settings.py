@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+from datetime import timedelta
 from pathlib import Path
+from .database import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,12 +54,24 @@ REST_FRAMEWORK= {
 
     "NON_FIELD_ERRORS_KEY":"errors",
       'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachingTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON, falling back to DRF's json module; see fitcom_app/renderers.py.
+    'DEFAULT_RENDERER_CLASSES': [
+        'fitcom_app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'fitcom_app.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'fitcom_app.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
 }
 
 SWAGGER_SETTINGS = {
@@ -67,9 +81,24 @@ SWAGGER_SETTINGS = {
             'name': 'Authorization',
             'in': 'header'
       }
-   }
+   },
+   # The UIs load the cached schema, see fitcom_project/schema.py.
+   'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+REDOC_SETTINGS = {
+   'SPEC_URL': ('schema-json', {'format': '.json'}),
 }
 
+# The OpenAPI schema is generated once per code version: CODE_VERSION (set by
+# the deploy, or Heroku's SOURCE_VERSION/HEROKU_SLUG_COMMIT) or else a hash of
+# the sources. `manage.py generate_schema` prebuilds it into SCHEMA_ROOT.
+CODE_VERSION = (
+    os.environ.get('CODE_VERSION') or os.environ.get('SOURCE_VERSION') or os.environ.get('HEROKU_SLUG_COMMIT') or ''
+)
+SCHEMA_ROOT = Path(os.environ.get('SCHEMA_ROOT', BASE_DIR / 'schema'))
+SCHEMA_CACHE_TIMEOUT = int(os.environ.get('SCHEMA_CACHE_TIMEOUT', 60 * 60))
+
 
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -94,6 +123,8 @@ CORS_ALLOW_HEADERS = [ "accept", "referer", "accept-encoding", "authorization",
 CORS_EXPOSE_HEADERS = ['Set-Cookie']
 CORS_ORIGIN_ALLOW_ALL = True
 MIDDLEWARE = [
+    'fitcom_app.middleware.RequestMetricsMiddleware',
+    'fitcom_app.middleware.CompressionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -129,16 +160,45 @@ WSGI_APPLICATION = 'fitcom_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DATABASE_URL and the DB_* variables configure the server and its connection
+# pool, see fitcom_project/database.py. Without DATABASE_URL the project uses
+# a local SQLite file, so deployments must set it and nothing (tests included)
+# reaches a shared database by accident.
 DATABASES = {
+    'default': database_config(f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+}
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'koyebdb',
-        'USER': 'koyeb-adm',
-        'PASSWORD': '4b7VpEkyQSYn',
-        'HOST': 'ep-tiny-math-a2hg4lvz.eu-central-1.pg.koyeb.app',
-        'OPTIONS': {'sslmode': 'require'},
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'fitcom'),
     }
 }
+
+# Exercise list/detail responses are cached per catalogue version, see fitcom_app/cache.py.
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get('CATALOGUE_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# prune_tombstones drops change-feed tombstones older than this; clients that
+# last synced before the newest pruned one get a full reset.
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', 90))
+
+# Authenticated tokens and their users are cached in the TOKEN_CACHE_ALIAS
+# cache. Run more than one worker with a shared CACHE_BACKEND (Redis,
+# Memcached), or a logout only reaches the worker that handled it. See
+# accounts/authentication.py.
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 60))
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS', 'default')
+TOKEN_EXPIRY = timedelta(days=int(os.environ.get('TOKEN_EXPIRY_DAYS', 30)))
+
+# Per-endpoint query counts and timings are aggregated by
+# fitcom_app.middleware.RequestMetricsMiddleware and served to admins at
+# /api/metrics/. SERVER_TIMING_HEADER=0 stops sending them to clients.
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', '1') != '0'
+
+# fitcom_app.middleware.CompressionMiddleware leaves smaller responses alone;
+# BROTLI_QUALITY trades CPU for ratio on per-request compression.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
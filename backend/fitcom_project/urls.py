@@ -17,30 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 ...
-from django.urls import re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-...
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Snippets API",
-      default_version='v1',
-      description="Test description",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@snippets.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from .schema import schema_json, schema_ui
 
 urlpatterns = [
-   path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-   path('api/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-   path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+   path('swagger<format>/', schema_json, name='schema-json'),
+   path('api/', schema_ui('swagger'), name='schema-swagger-ui'),
+   path('redoc/', schema_ui('redoc'), name='schema-redoc'),
    path('admin/', admin.site.urls),
    path('auth/', include('accounts.urls')),
    path('api/', include('fitcom_app.urls'))
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings. The Procfile runs gunicorn with --chdir backend, so this
+file is picked up automatically.
+
+By default the app is served over ASGI by uvicorn workers: each worker runs an
+event loop, so slow mobile clients and the async read views under /api/async/
+wait on the loop instead of holding a thread each. The DRF viewsets still work
+unchanged; Django runs them in a thread per request.
+
+Set GUNICORN_WORKER_CLASS=sync (or gthread) to go back to plain WSGI workers.
+"""
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+wsgi_app = 'fitcom_project.asgi:application' if 'uvicorn' in worker_class.lower() else 'fitcom_project.wsgi:application'
+
+# Under ASGI, Django opens connections from several threads per worker, so
+# persistent connections would pile up; rely on the pool instead (see
+# fitcom_project/database.py). The workers inherit this environment.
+if wsgi_app.endswith('asgi:application'):
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+# Heroku sets WEB_CONCURRENCY from the dyno size.
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 20
+keepalive = 5
+
+# Recycle workers now and then so a slow leak cannot take a dyno down.
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    # Load the OpenAPI schema (from SCHEMA_ROOT when `manage.py generate_schema`
+    # ran at build time) before the worker takes requests.
+    from fitcom_project.schema import CODECS, get_schema
+    for format in CODECS:
+        get_schema(format)
@@ -57,7 +57,7 @@ describe("SettingsScreen", () => {
       }
 
       // Mock fetch for workout programs
-      if (url.endsWith("/api/user-custom-workout-programs/")) {
+      if (url.endsWith("/api/user-custom-workout-programs/?expand=schedule")) {
         return Promise.resolve({
           ok: true,
           json: () =>
@@ -140,7 +140,7 @@ describe("SettingsScreen", () => {
       }
 
       // Mock fetch for workout programs
-      if (url.endsWith("/api/user-custom-workout-programs/")) {
+      if (url.endsWith("/api/user-custom-workout-programs/?expand=schedule")) {
         return Promise.resolve({
           ok: true,
           json: () =>
@@ -226,7 +226,7 @@ describe("SettingsScreen", () => {
       }
 
       // Mock fetch for workout programs
-      if (url.endsWith("/api/user-custom-workout-programs/")) {
+      if (url.endsWith("/api/user-custom-workout-programs/?expand=schedule")) {
         return Promise.resolve({
           ok: true,
           json: () =>
@@ -21,6 +21,7 @@ type Post = {
   content: string;
   timestamp: string;
   likes: number;
+  comment_count: number;
   comments: Comment[];
   image?: string;
   type?: string;
@@ -42,6 +43,9 @@ const CommunityScreen = () => {
   const [newPostImage, setNewPostImage] = useState<string | null>(null);
   const [filterType, setFilterType] = useState<"all" | "recipe" | "question">("all");
   const [sortOrder, setSortOrder] = useState<"newest" | "popular">("newest");
+  // The feed is paginated; the next page is loaded when the list is scrolled to the end.
+  const [nextPageUrl, setNextPageUrl] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
 
   useEffect(() => {
@@ -59,26 +63,37 @@ const CommunityScreen = () => {
   };
 
 
-  const fetchPosts = async (): Promise<void> => {
+  const fetchPosts = async (pageUrl?: string): Promise<void> => {
     try {
-      const response = await fetch("https://fitcom-9fc3ecf39e06.herokuapp.com/api/posts/");
-      const data: Post[] = await response.json();
+      const response = await fetch(pageUrl || "https://fitcom-9fc3ecf39e06.herokuapp.com/api/posts/");
+      const body = await response.json();
+      const data: Post[] = Array.isArray(body) ? body : body.results;
       const enrichedData = data.map((post) => ({
         ...post,
         type: post.type || "question",
       }));
-      setPosts(enrichedData);
+      setPosts((current) => (pageUrl ? [...current, ...enrichedData] : enrichedData));
+      setNextPageUrl(Array.isArray(body) ? null : body.next);
     } catch (error) {
       console.error("Error fetching posts:", error);
       Alert.alert("Error", "Failed to load posts. Please try again later.");
     }
   };
 
+  const loadMorePosts = async (): Promise<void> => {
+    if (!nextPageUrl || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    await fetchPosts(nextPageUrl);
+    setLoadingMore(false);
+  };
+
 
   const likePost = async (postId: string): Promise<void> => {
     try {
       console.log(`Liking post with ID: ${postId}`);
-      const url = `https://fitcom-9fc3ecf39e06.herokuapp.com/api/posts/${postId}/`;
+      const url = `https://fitcom-9fc3ecf39e06.herokuapp.com/api/posts/${postId}/like/`;
 
       const token = await getUserToken();
       if (!token) {
@@ -86,33 +101,23 @@ const CommunityScreen = () => {
         return;
       }
 
-      const getResponse = await fetch(url, {
-        method: "GET",
+      const response = await fetch(url, {
+        method: "POST",
         headers: {
           Authorization: `Token ${token}`,
         },
       });
 
-      if (!getResponse.ok) {
-        console.error(`Error fetching post data (status ${getResponse.status}):`, await getResponse.text());
-        Alert.alert("Error", `Failed to fetch post data. Status: ${getResponse.status}`);
+      if (!response.ok) {
+        console.error(`Error liking post (status ${response.status}):`, await response.text());
+        Alert.alert("Error", `Failed to like post. Status: ${response.status}`);
         return;
       }
 
-      const postData = await getResponse.json();
-      const newLikes = postData.likes + 1;
-
-
-      const patchResponse = await fetch(url, {
-        method: "PATCH",
-        headers: {
-          Authorization: `Token ${token}`,
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({ likes: newLikes }),
-      });
-
-
+      const { likes } = await response.json();
+      setPosts((currentPosts) =>
+        currentPosts.map((post) => (post.post_id === postId ? { ...post, likes } : post))
+      );
     } catch (error) {
       console.error("Error liking post:", error);
       Alert.alert("Error", "An unexpected error occurred while liking the post.");
@@ -242,6 +247,8 @@ const CommunityScreen = () => {
         renderItem={renderPost}
         keyExtractor={(item) => item.post_id}
         contentContainerStyle={styles.postsContainer}
+        onEndReached={loadMorePosts}
+        onEndReachedThreshold={0.5}
       />
 
       <Modal visible={modalVisible} transparent={true} animationType="slide">
@@ -28,6 +28,22 @@ interface Exercise {
 }
 import AsyncStorage from '@react-native-async-storage/async-storage';
 
+const EXERCISES_URL = "https://fitcom-9fc3ecf39e06.herokuapp.com/api/exercises/";
+const CATALOGUE_KEY = "exerciseCatalogue";
+
+// The catalogue kept on the device and the change version it is current to.
+interface CachedCatalogue {
+  version: number;
+  exercises: Exercise[];
+}
+
+interface CatalogueChanges {
+  version: number;
+  reset: boolean;
+  changed: Exercise[];
+  deleted: string[];
+}
+
 const FitnessScreen: React.FC = () => {
   const [exercises, setExercises] = useState<Exercise[]>([]);
   const [filteredExercises, setFilteredExercises] = useState<Exercise[]>([]);
@@ -47,27 +63,52 @@ const FitnessScreen: React.FC = () => {
         return;
       }
 
-      const response = await fetch(
-        "https://fitcom-9fc3ecf39e06.herokuapp.com/api/exercises/",
-        {
-          method: "GET",
-          headers: {
-
-            Authorization: `Token ${token}`,
-            Accept: "application/json",
-
-            "Content-Type": "application/json",
-          },
-        }
+      const headers = {
+        Authorization: `Token ${token}`,
+        Accept: "application/json",
+      };
+      const cached: CachedCatalogue | null = JSON.parse(
+        (await AsyncStorage.getItem(CATALOGUE_KEY)) || "null"
       );
+      let catalogue: CachedCatalogue;
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! Status: ${response.status}`);
+      if (cached) {
+        // Only what changed since the cached copy, usually a few hundred bytes.
+        const response = await fetch(`${EXERCISES_URL}changes/?since=${cached.version}`, {
+          method: "GET",
+          headers,
+        });
+        if (!response.ok) {
+          throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        const delta: CatalogueChanges = await response.json();
+        const byId = new Map<string, Exercise>(
+          delta.reset ? [] : cached.exercises.map((exercise) => [exercise.exercise_id, exercise])
+        );
+        delta.deleted.forEach((exerciseId) => byId.delete(exerciseId));
+        delta.changed.forEach((exercise) => byId.set(exercise.exercise_id, exercise));
+        catalogue = {
+          version: delta.version,
+          exercises: [...byId.values()].sort((a, b) => a.name.localeCompare(b.name)),
+        };
+      } else {
+        // The whole catalogue in one precompressed response; it is filtered on the device.
+        const response = await fetch(`${EXERCISES_URL}bundle/`, { method: "GET", headers });
+        if (!response.ok) {
+          throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        const body = await response.json();
+        catalogue = {
+          version: Number(response.headers?.get("X-Change-Version")) || 0,
+          exercises: Array.isArray(body) ? body : body.results,
+        };
       }
 
-      const data: Exercise[] = await response.json();
-      setExercises(data);
-      setFilteredExercises(data);
+      if (catalogue.version) {
+        await AsyncStorage.setItem(CATALOGUE_KEY, JSON.stringify(catalogue));
+      }
+      setExercises(catalogue.exercises);
+      setFilteredExercises(catalogue.exercises);
     } catch (error) {
       console.error("Error fetching exercises:", error);
       Alert.alert("Error", "Failed to fetch exercises. Please try again later.");
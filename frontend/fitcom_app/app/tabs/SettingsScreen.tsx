@@ -99,21 +99,28 @@ const SettingsScreen = () => {
         return;
       }
 
-      const response = await fetch(
-        "https://fitcom-9fc3ecf39e06.herokuapp.com/api/user-custom-workout-programs/",
-        {
+      // Lists are compact by default; the exercise cards need the instructions.
+      let pageUrl: string | null =
+        "https://fitcom-9fc3ecf39e06.herokuapp.com/api/user-custom-workout-programs/?expand=schedule";
+      const programs: WorkoutProgram[] = [];
+
+      // The list is paginated; follow `next` until every program is loaded.
+      while (pageUrl) {
+        const response = await fetch(pageUrl, {
           headers: {
             Authorization: `Token ${token}`,
           },
-        }
-      );
+        });
 
-      if (response.ok) {
-        const data: WorkoutProgram[] = await response.json();
-        setWorkoutPrograms(data);
-      } else {
-        Alert.alert("Error", "Failed to fetch workout programs.");
+        if (!response.ok) {
+          Alert.alert("Error", "Failed to fetch workout programs.");
+          return;
+        }
+        const body = await response.json();
+        programs.push(...(Array.isArray(body) ? body : body.results));
+        pageUrl = Array.isArray(body) ? null : body.next;
       }
+      setWorkoutPrograms(programs);
     } catch (error) {
       console.error("Error fetching workout programs:", error);
       Alert.alert("Error", "An unexpected error occurred while fetching workout programs.");